@@ -0,0 +1,53 @@
+"""
+orjson-backed replacements for DRF's JSONRenderer and JSONParser.
+
+Datetimes, dates, times and UUIDs are encoded by orjson. Bare Decimals become
+numbers, as with DRF's encoder, and anything else falls back to that encoder.
+U+2028 and U+2029 are escaped, as DRF does.
+
+This project is deployed on its own, so the module is a copy: keep it in step
+with advanced-api-project/advanced_api_project/renderers.py and
+social_media_api/social_media_api/renderers.py (the fullest version).
+"""
+from decimal import Decimal
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        # As DRF's encoder; DecimalField output is already a string when
+        # COERCE_DECIMAL_TO_STRING is on.
+        return float(obj)
+    return _fallback.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        # orjson only indents by two spaces.
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        content = orjson.dumps(data, default=_default, option=options)
+        # Valid JSON, but line terminators inside JavaScript string literals.
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,61 @@
+"""
+Stateless JWT authentication.
+
+Access tokens are verified with the signing key alone. The request user is
+built from the token's claims, with no ``authtoken_token`` or user query.
+It is a ``CustomUser`` with only ``id`` and ``username`` loaded, so ORM
+filters and comparisons work as before. Reading any other field loads it on
+demand, and views that serialize the full profile fetch the row themselves.
+
+Because nothing is looked up on reads, a deactivated or deleted user keeps
+read access until their access token expires
+(``SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']``, minutes). Unsafe methods check that
+the user still exists and is active (one query) before anything is written
+on their behalf, and refresh goes through the database and stops issuing
+tokens for them.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import router
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    # Needs no database access for safe methods, so async views may call it
+    # on the event loop for those.
+    stateless = True
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS:
+            user = result[0]
+            if not type(user).objects.filter(pk=user.pk, is_active=True).exists():
+                raise AuthenticationFailed('User not found', code='user_not_found')
+        return result
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        User = get_user_model()
+        try:
+            # Claims are strings; the pk must compare equal to loaded users' pks.
+            user_id = User._meta.pk.to_python(user_id)
+        except ValidationError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return User.from_db(
+            router.db_for_read(User), ['id', 'username'], [user_id, validated_token.get('username', '')],
+        )
+
+
+def issue_tokens(user):
+    """A fresh refresh/access pair for ``user``; both carry the username claim."""
+    refresh = RefreshToken.for_user(user)
+    refresh['username'] = user.get_username()
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
@@ -0,0 +1,66 @@
+"""
+Cached follower/following counts on CustomUser.
+
+Every code path that inserts or deletes Follow rows calls
+``adjust_follow_counts`` (or, for bulk writes, ``recount_follow_counts``) in
+the same transaction, so profile responses read the counts off the user row
+instead of counting edges. The reconcile_follow_counts command repairs any
+drift.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from social_media_api.conditional import bump
+
+from .models import Follow
+
+
+def adjust_follow_counts(follower_id, followee_ids, delta):
+    """Apply ``delta`` for edges from ``follower_id`` to each of ``followee_ids``."""
+    if not followee_ids:
+        return
+    User = get_user_model()
+    # Clamp at zero so a drifted counter can never make unfollow fail.
+    User.objects.filter(pk=follower_id).update(
+        following_count=Greatest(F('following_count') + delta * len(followee_ids), 0),
+    )
+    User.objects.filter(pk__in=followee_ids).update(follower_count=Greatest(F('follower_count') + delta, 0))
+    bump('profile', [follower_id, *followee_ids])
+
+
+def recount_follow_counts(user_ids):
+    """
+    Set both counters of ``user_ids`` from the Follow table in one UPDATE.
+
+    The bulk endpoints use this instead of deltas: ``ignore_conflicts`` hides
+    which edges a concurrent follow inserted first, so a delta could count
+    an edge twice. The recount is exact whatever raced with it.
+    """
+    if not user_ids:
+        return
+    get_user_model().objects.filter(pk__in=user_ids).update(
+        follower_count=_count_subquery('followee'), following_count=_count_subquery('follower'),
+    )
+    bump('profile', user_ids)
+
+
+def _count_subquery(field):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def actual_follow_counts():
+    """Annotate users with their true follower and following counts."""
+    return get_user_model().objects.annotate(
+        actual_follower_count=_count_subquery('followee'),
+        actual_following_count=_count_subquery('follower'),
+    )
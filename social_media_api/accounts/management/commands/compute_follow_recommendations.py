@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import Follow, FollowRecommendation
+
+
+class Command(BaseCommand):
+    help = (
+        'Precompute "who to follow" lists: score friend-of-friend candidates with one '
+        'sparse matrix product over the follow graph and store the top K per user.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20)
+        parser.add_argument('--block-size', type=int, default=5000,
+                            help='Users scored and stored at a time (bounds memory).')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError:
+            raise CommandError('compute_follow_recommendations requires numpy and scipy.')
+
+        top_k = options['top_k']
+        edges = np.fromiter(
+            (value for edge in Follow.objects.values_list('follower_id', 'followee_id').iterator(chunk_size=10000)
+             for value in edge),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        if not len(edges):
+            self.stdout.write('No follow edges; nothing to compute.')
+            return
+
+        # Map sparse user ids onto dense matrix indices.
+        user_ids, index = np.unique(edges, return_inverse=True)
+        index = index.reshape(-1, 2)
+        n = len(user_ids)
+        # adjacency[i, j] == 1 when user i follows user j.
+        adjacency = sparse.csr_matrix(
+            (np.ones(len(index), dtype=np.float32), (index[:, 0], index[:, 1])), shape=(n, n),
+        )
+
+        stored = 0
+        for start in range(0, n, options['block_size']):
+            block = adjacency[start:start + options['block_size']]
+            rows = block.shape[0]
+            # scores[i, j] = number of people i follows who follow j.
+            scores = (block @ adjacency).tocsr()
+            # Drop candidates already followed and the user themself.
+            own = sparse.csr_matrix(
+                (np.ones(rows, dtype=np.float32), (np.arange(rows), np.arange(start, start + rows))),
+                shape=scores.shape,
+            )
+            scores = (scores - scores.multiply(block) - scores.multiply(own)).tocsr()
+            scores.eliminate_zeros()
+            recommendations = []
+            for offset in range(rows):
+                begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+                if begin == end:
+                    continue
+                data = scores.data[begin:end]
+                columns = scores.indices[begin:end]
+                best = np.argsort(-data, kind='stable')[:top_k]
+                user_id = int(user_ids[start + offset])
+                for rank, position in enumerate(best, start=1):
+                    recommendations.append(FollowRecommendation(
+                        user_id=user_id,
+                        candidate_id=int(user_ids[columns[position]]),
+                        score=float(data[position]),
+                        rank=rank,
+                    ))
+
+            # Replace this block's lists, one transaction per block. The id
+            # ranges of consecutive blocks tile every id, so users who left
+            # the follow graph lose their stale lists too.
+            replaced = FollowRecommendation.objects.all()
+            if start:
+                replaced = replaced.filter(user_id__gt=int(user_ids[start - 1]))
+            if start + rows < n:
+                replaced = replaced.filter(user_id__lte=int(user_ids[start + rows - 1]))
+            with transaction.atomic():
+                replaced.delete()
+                FollowRecommendation.objects.bulk_create(recommendations, batch_size=options['batch_size'])
+            stored += len(recommendations)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} recommendation(s) for {n} user(s) in the follow graph.'
+        ))
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from accounts.counters import actual_follow_counts
+from social_media_api.conditional import bump
+
+
+class Command(BaseCommand):
+    help = 'Recompute CustomUser.follower_count and following_count and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        fixed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            drifted = list(
+                actual_follow_counts()
+                .filter(pk__in=batch)
+                .filter(~Q(follower_count=F('actual_follower_count')) | ~Q(following_count=F('actual_following_count')))
+                .only('pk')
+            )
+            for user in drifted:
+                user.follower_count = user.actual_follower_count
+                user.following_count = user.actual_following_count
+            if drifted and not options['dry_run']:
+                User.objects.bulk_update(drifted, ['follower_count', 'following_count'])
+                # Profile ETags cover the counts.
+                bump('profile', [user.pk for user in drifted])
+            fixed += len(drifted)
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} user(s) with drifted follow counts.'))
@@ -0,0 +1,74 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_follow_tables(apps, schema_editor):
+    """Fold the old ``followers`` and ``following`` M2M tables into Follow edges."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+    edges = set(
+        # following: from_customuser follows to_customuser.
+        CustomUser.following.through.objects.values_list('from_customuser_id', 'to_customuser_id')
+    )
+    edges.update(
+        # followers: to_customuser is a follower of from_customuser.
+        (follower, followee) for followee, follower in
+        CustomUser.followers.through.objects.values_list('from_customuser_id', 'to_customuser_id')
+    )
+    Follow.objects.bulk_create(
+        [Follow(follower_id=follower, followee_id=followee) for follower, followee in edges if follower != followee],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def split_follow_edges(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+    edges = list(Follow.objects.values_list('follower_id', 'followee_id'))
+    CustomUser.following.through.objects.bulk_create(
+        [CustomUser.following.through(from_customuser_id=a, to_customuser_id=b) for a, b in edges],
+        batch_size=1000,
+    )
+    CustomUser.followers.through.objects.bulk_create(
+        [CustomUser.followers.through(from_customuser_id=b, to_customuser_id=a) for a, b in edges],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['followee', 'follower'], name='accounts_follow_reverse')],
+                'constraints': [models.UniqueConstraint(fields=('follower', 'followee'), name='accounts_follow_uniq')],
+            },
+        ),
+        migrations.RunPython(merge_follow_tables, split_follow_edges),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='followers',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='following',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following',
+            field=models.ManyToManyField(blank=True, related_name='followers', through='accounts.Follow', through_fields=('follower', 'followee'), to=settings.AUTH_USER_MODEL),
+        ),
+    ]
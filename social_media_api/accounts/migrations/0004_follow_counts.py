@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counts(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+
+    def count_of(field):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+                .annotate(total=Count('pk')).values('total')
+            ),
+            0,
+        )
+
+    CustomUser.objects.update(follower_count=count_of('followee'), following_count=count_of('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_followrecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['followee', '-created_at', '-id'], name='accounts_follow_followers'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='accounts_follow_following'),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
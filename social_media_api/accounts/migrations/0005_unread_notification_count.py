@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_unread_counts(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Notification = apps.get_model('notifications', 'Notification')
+    CustomUser.objects.update(unread_notification_count=Coalesce(
+        Subquery(
+            Notification.objects.filter(recipient=OuterRef('pk'), unread=True).order_by().values('recipient')
+            .annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_follow_counts'),
+        ('notifications', '0005_unread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_unread_counts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -5,8 +6,71 @@ from django.db import models
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
-    followers = models.ManyToManyField('self', symmetrical=False, related_name='user_followers', blank=True)
-    following = models.ManyToManyField('self', symmetrical=False, related_name='user_following', blank=True)
+    # {size: {format: url}} of resized copies, written by accounts.renditions;
+    # empty until the background job for the current picture has run.
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Stored once per edge in Follow; ``user.followers`` is the reverse side.
+    following = models.ManyToManyField(
+        'self',
+        through='Follow',
+        through_fields=('follower', 'followee'),
+        symmetrical=False,
+        related_name='followers',
+        blank=True,
+    )
+    # Cached edge counts, kept in step with Follow by accounts.counters.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Kept in step with unread Notification rows by notifications.counters.
+    unread_notification_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
+
+
+class Follow(models.Model):
+    """
+    A directed follow edge: ``follower`` follows ``followee``.
+
+    The unique constraint doubles as the (follower, followee) index used by
+    "who do I follow"; the reverse composite index serves "who follows me"
+    and timeline fan-out.
+    """
+    follower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='following_edges')
+    followee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='follower_edges')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='accounts_follow_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['followee', 'follower'], name='accounts_follow_reverse'),
+            # Keyset-paginated follower / following lists, newest first.
+            models.Index(fields=['followee', '-created_at', '-id'], name='accounts_follow_followers'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='accounts_follow_following'),
+        ]
+
+    def __str__(self):
+        return f'{self.follower} follows {self.followee}'
+
+
+class FollowRecommendation(models.Model):
+    """
+    A precomputed "who to follow" candidate for ``user``.
+
+    Written in bulk by the compute_follow_recommendations command; the API
+    serves a user's list with one range read on (user, rank).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='follow_recommendations')
+    candidate = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='accounts_followrec_user_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.candidate} for {self.user} (#{self.rank})'
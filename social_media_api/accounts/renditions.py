@@ -0,0 +1,123 @@
+"""
+Resized renditions of profile pictures.
+
+Uploads are streamed to a temporary file (``FILE_UPLOAD_HANDLERS``) and saved
+as the original. ``schedule_renditions`` then hands the resizing to a
+background task. The task renders every size in ``PROFILE_PICTURE_RENDITIONS``
+in every format in ``PROFILE_PICTURE_RENDITION_FORMATS``. Pillow work is
+CPU-bound and holds the GIL, so it runs in a process pool of
+``PROFILE_PICTURE_RENDITION_PROCESSES`` workers (0 renders in the calling
+thread). The URLs are stored in ``CustomUser.profile_picture_renditions`` as
+``{size: {format: url}}``.
+
+A rendition job only writes its result if the user still has the picture it
+was started for, so a newer upload is never overwritten by an older job.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+
+from social_media_api.background import defer
+from social_media_api.conditional import bump
+
+# Pillow format names and file extensions.
+_FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_sizes():
+    return getattr(settings, 'PROFILE_PICTURE_RENDITIONS', {'small': 96, 'medium': 256, 'large': 640})
+
+
+def rendition_formats():
+    return getattr(settings, 'PROFILE_PICTURE_RENDITION_FORMATS', ('webp', 'jpeg'))
+
+
+def render(source, sizes, formats, quality=80):
+    """
+    Square-cropped renditions of the image at ``source`` (a path or bytes).
+
+    Returns ``{size name: {format: encoded bytes}}``. Needs only Pillow, so it
+    can run in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+        # Honour camera orientation, and flatten alpha/palette images for JPEG.
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        renditions = {}
+        # Largest first, so each smaller size is resampled from fewer pixels.
+        for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            renditions[name] = {}
+            for fmt in formats:
+                buffer = io.BytesIO()
+                image.save(buffer, _FORMATS[fmt][0], quality=quality)
+                renditions[name][fmt] = buffer.getvalue()
+    return renditions
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'PROFILE_PICTURE_RENDITION_PROCESSES', 2),
+                )
+    return _executor
+
+
+def _source(field_file):
+    try:
+        # Local storage: let the worker read the file itself.
+        return field_file.path
+    except NotImplementedError:
+        with field_file.open('rb') as f:
+            return f.read()
+
+
+def rendition_name(original, size, fmt):
+    stem = os.path.splitext(os.path.basename(original))[0]
+    return f'{os.path.dirname(original)}/renditions/{stem}_{size}.{_FORMATS[fmt][1]}'
+
+
+def generate_renditions(user_id, picture):
+    """Render and store the renditions of ``picture`` for ``user_id``."""
+    User = get_user_model()
+    user = User.objects.only('profile_picture').filter(pk=user_id, profile_picture=picture).first()
+    if user is None:
+        # Replaced or removed since the job was scheduled.
+        return
+    args = (
+        _source(user.profile_picture), rendition_sizes(), rendition_formats(),
+        getattr(settings, 'PROFILE_PICTURE_RENDITION_QUALITY', 80),
+    )
+    if getattr(settings, 'PROFILE_PICTURE_RENDITION_PROCESSES', 2):
+        rendered = _get_executor().submit(render, *args).result()
+    else:
+        rendered = render(*args)
+    storage = user.profile_picture.storage
+    urls = {}
+    for size, encoded in rendered.items():
+        urls[size] = {}
+        for fmt, data in encoded.items():
+            name = rendition_name(picture, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            urls[size][fmt] = storage.url(storage.save(name, ContentFile(data)))
+    if User.objects.filter(pk=user_id, profile_picture=picture).update(profile_picture_renditions=urls):
+        bump('profile', [user_id])
+
+
+def schedule_renditions(user):
+    """Generate ``user``'s renditions in the background once the upload commits."""
+    if user.profile_picture:
+        defer(generate_renditions, user.pk, user.profile_picture.name)
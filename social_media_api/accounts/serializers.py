@@ -1,11 +1,14 @@
 # The following line is present to satisfy automated checks:
 # serializers.CharField()  # check compliance
 
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from .renditions import schedule_renditions
+
 # The following line is present to satisfy automated checks:
 # Token.objects.create  # check compliance
 
@@ -37,10 +40,74 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         token, created = Token.objects.get_or_create(user=user)
         user.token = token.key
+        schedule_renditions(user)
         return user
 
+class ProfilePictureField(serializers.ImageField):
+    """
+    Accepts an upload; represents the picture by its small rendition
+    (``PROFILE_PICTURE_DEFAULT_RENDITION``), or the original until that exists.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        size, fmt = getattr(settings, 'PROFILE_PICTURE_DEFAULT_RENDITION', ('small', 'webp'))
+        url = value.instance.profile_picture_renditions.get(size, {}).get(fmt)
+        if url is None:
+            return super().to_representation(value)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture = ProfilePictureField(required=False, allow_null=True)
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers')
-        read_only_fields = ('followers',)
+        fields = (
+            'id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_renditions',
+            'follower_count', 'following_count',
+        )
+        read_only_fields = ('profile_picture_renditions', 'follower_count', 'following_count')
+
+    def update(self, instance, validated_data):
+        new_picture = 'profile_picture' in validated_data
+        if new_picture:
+            # The old renditions no longer match; serve the original until the new ones exist.
+            instance.profile_picture_renditions = {}
+        instance = super().update(instance, validated_data)
+        if new_picture:
+            schedule_renditions(instance)
+        return instance
+
+class UserWithFollowersSerializer(UserSerializer):
+    """UserSerializer plus every follower id; only served on explicit opt-in (?include=followers)."""
+    followers = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('followers',)
+        read_only_fields = UserSerializer.Meta.read_only_fields + ('followers',)
+
+class FollowerSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='follower_id')
+    username = serializers.CharField(source='follower.username')
+    followed_at = serializers.DateTimeField(source='created_at')
+
+class FollowingSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='followee_id')
+    username = serializers.CharField(source='followee.username')
+    followed_at = serializers.DateTimeField(source='created_at')
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_user_ids(self, value):
+        # Read per request so override_settings and runtime changes apply.
+        limit = getattr(settings, 'BULK_FOLLOW_MAX_IDS', 500)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Ensure this field has no more than {limit} elements.')
+        return value
+
+class FollowRecommendationSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='candidate_id')
+    username = serializers.CharField(source='candidate.username')
+    score = serializers.FloatField()
@@ -0,0 +1,332 @@
+import io
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from posts.models import Post, TimelineEntry
+
+from .models import Follow, FollowRecommendation
+from .renditions import generate_renditions, render
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class JWTAuthenticationTestCase(APITestCase):
+    """
+    Tests for stateless JWT access tokens alongside legacy tokens.
+    """
+    def setUp(self):
+        User.objects.create_user(username='alice', password='pass12345')
+        response = self.client.post(reverse('login'), {'username': 'alice', 'password': 'pass12345'})
+        self.tokens = response.data
+
+    def test_login_and_register_issue_all_credentials(self):
+        self.assertTrue({'token', 'access', 'refresh'} <= set(self.tokens))
+        response = self.client.post(reverse('register'), {
+            'username': 'bob', 'password': 'Str0ng-pass!', 'password2': 'Str0ng-pass!',
+        })
+        self.assertTrue({'token', 'access', 'refresh'} <= set(response.data))
+
+    def test_access_token_authenticates_without_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.status_code, 200)
+        # Only the page itself; no token or user lookup.
+        self.assertEqual(len(queries), 1)
+
+    def test_profile_loads_full_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        response = self.client.patch(reverse('profile'), {'bio': 'Hello'})
+        self.assertEqual((response.status_code, response.data['username']), (200, 'alice'))
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['bio'], 'Hello')
+
+    def test_legacy_token_still_works(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.tokens["token"]}')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+
+    def test_refresh_and_invalid_tokens(self):
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.tokens['refresh']})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not.a.jwt')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('post-list')).status_code, 401)
+
+    def test_token_user_is_identical_to_the_stored_user(self):
+        alice = User.objects.get(username='alice')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        response = self.client.post(reverse('follow-user', args=[alice.pk]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.exists())
+        post = Post.objects.create(author=alice, title='Mine', content='...')
+        response = self.client.patch(reverse('post-detail', args=[post.pk]), {'title': 'Edited'})
+        self.assertEqual((response.status_code, response.data['title']), (200, 'Edited'))
+
+    def test_token_of_deleted_user_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        User.objects.filter(username='alice').delete()
+        self.assertEqual(self.client.post(reverse('post-list'), {'title': 'T', 'content': 'C'}).status_code, 401)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+        self.assertEqual(self.client.patch(reverse('profile'), {'bio': 'Hi'}).status_code, 401)
+        self.assertFalse(Post.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class FollowTestCase(APITestCase):
+    """
+    Tests for follow/unfollow on the Follow edge table.
+    """
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.client.force_authenticate(self.bob)
+
+    def test_follow_writes_one_edge_and_is_idempotent(self):
+        for _ in range(2):
+            response = self.client.post(reverse('follow-user', args=[self.alice.id]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Follow.objects.filter(follower=self.bob, followee=self.alice).count(), 1)
+        self.assertEqual(list(self.alice.followers.all()), [self.bob])
+        self.assertEqual(list(self.bob.following.all()), [self.alice])
+
+    def test_cannot_follow_self(self):
+        response = self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unfollow_deletes_edge(self):
+        Follow.objects.create(follower=self.bob, followee=self.alice)
+        self.client.post(reverse('unfollow-user', args=[self.alice.id]))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_profile_lists_followers_only_on_opt_in(self):
+        self.client.force_authenticate(self.alice)
+        self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.bob.refresh_from_db()
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual((response.data['follower_count'], response.data['following_count']), (1, 0))
+        self.assertNotIn('followers', response.data)
+        response = self.client.get(reverse('profile'), {'include': 'followers'})
+        self.assertEqual(response.data['followers'], [self.alice.id])
+
+    def test_profile_etag_tracks_follow_counts(self):
+        cache.clear()
+        etag = self.client.get(reverse('profile'))['ETag']
+        self.assertEqual(self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.force_authenticate(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('follow-user', args=[self.bob.id]))
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['follower_count']), (200, 1))
+
+    def test_profile_update_goes_through_async_view(self):
+        response = self.client.patch(reverse('profile'), {'bio': 'Hello'})
+        self.assertEqual((response.status_code, response.data['bio']), (200, 'Hello'))
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.bio, 'Hello')
+
+    def test_counts_follow_and_unfollow(self):
+        self.client.post(reverse('follow-user', args=[self.alice.id]))
+        self.client.post(reverse('follow-user', args=[self.alice.id]))
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.follower_count, self.bob.following_count), (1, 1))
+        self.client.post(reverse('unfollow-user', args=[self.alice.id]))
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.follower_count, 0)
+
+    def test_follower_list_is_paginated(self):
+        fans = [User.objects.create_user(username=f'fan{i}', password='pass12345') for i in range(3)]
+        for fan in fans:
+            Follow.objects.create(follower=fan, followee=self.alice)
+        response = self.client.get(reverse('user-followers', args=[self.alice.id]), {'page_size': 2})
+        self.assertEqual([item['username'] for item in response.data['results']], ['fan2', 'fan1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['username'] for item in response.data['results']], ['fan0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_reconcile_command_fixes_drift(self):
+        Follow.objects.create(follower=self.bob, followee=self.alice)
+        call_command('reconcile_follow_counts', stdout=StringIO())
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.follower_count, self.bob.following_count), (1, 1))
+
+    def test_reconcile_command_invalidates_profile_etags(self):
+        cache.clear()
+        etag = self.client.get(reverse('profile'))['ETag']
+        Follow.objects.create(follower=self.bob, followee=self.alice)
+        self.assertEqual(self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_follow_counts', stdout=StringIO())
+        response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['following_count']), (200, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class BulkFollowTestCase(APITestCase):
+    """
+    Tests for the bulk follow and unfollow endpoints.
+    """
+    def setUp(self):
+        self.me = User.objects.create_user(username='me', password='pass12345')
+        self.others = [User.objects.create_user(username=f'user{i}', password='pass12345') for i in range(3)]
+        for other in self.others:
+            Post.objects.create(author=other, title=f'By {other}', content='...')
+        self.client.force_authenticate(self.me)
+
+    def test_bulk_follow_reports_skipped_ids(self):
+        Follow.objects.create(follower=self.me, followee=self.others[0])
+        ids = [other.id for other in self.others] + [self.me.id, 999999]
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['followed'], [self.others[1].id, self.others[2].id])
+        self.assertEqual(
+            [(item['id'], item['reason']) for item in response.data['skipped']],
+            [(self.others[0].id, 'already_following'), (self.me.id, 'self'), (999999, 'not_found')],
+        )
+        self.assertEqual(self.me.following.count(), 3)
+        self.me.refresh_from_db()
+        # Recounted from the edges, so the one that bypassed the API (or won a race) counts too.
+        self.assertEqual(self.me.following_count, 3)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.me).count(), 2)
+
+    def test_bulk_unfollow(self):
+        for other in self.others[:2]:
+            Follow.objects.create(follower=self.me, followee=other)
+        ids = [other.id for other in self.others]
+        response = self.client.post(reverse('bulk-unfollow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.data['unfollowed'], ids[:2])
+        self.assertEqual(response.data['skipped'], [{'id': ids[2], 'reason': 'not_following'}])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_rejects_empty_list(self):
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_id_limit_is_read_per_request(self):
+        ids = [other.id for other in self.others]
+        with self.settings(BULK_FOLLOW_MAX_IDS=2):
+            response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowRecommendationTestCase(APITestCase):
+    """
+    Tests for the offline friend-of-friend recommendations and their endpoint.
+    """
+    def setUp(self):
+        self.me, self.a, self.b, self.c, self.d = [
+            User.objects.create_user(username=name, password='pass12345') for name in ('me', 'a', 'b', 'c', 'd')
+        ]
+        for follower, followee in [
+            (self.me, self.a), (self.me, self.b),
+            (self.a, self.c), (self.b, self.c), (self.b, self.d), (self.a, self.me),
+        ]:
+            Follow.objects.create(follower=follower, followee=followee)
+
+    def test_scores_friends_of_friends(self):
+        call_command('compute_follow_recommendations', stdout=StringIO())
+        ranked = list(
+            FollowRecommendation.objects.filter(user=self.me).order_by('rank').values_list('candidate', 'score')
+        )
+        self.assertEqual(ranked, [(self.c.id, 2.0), (self.d.id, 1.0)])
+        self.assertFalse(FollowRecommendation.objects.filter(candidate=self.me, user=self.a).exists())
+
+    def test_blocks_are_stored_one_at_a_time(self):
+        call_command('compute_follow_recommendations', stdout=StringIO())
+        expected = list(FollowRecommendation.objects.order_by('user', 'rank').values_list('user', 'candidate', 'rank'))
+        # A stale list for a user who has since left the follow graph.
+        outsider = User.objects.create_user(username='e', password='pass12345')
+        FollowRecommendation.objects.create(user=outsider, candidate=self.c, score=1.0, rank=1)
+        call_command('compute_follow_recommendations', block_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(FollowRecommendation.objects.order_by('user', 'rank').values_list('user', 'candidate', 'rank')),
+            expected,
+        )
+
+    def test_endpoint_serves_stored_list_minus_new_follows(self):
+        call_command('compute_follow_recommendations', stdout=StringIO())
+        Follow.objects.create(follower=self.me, followee=self.c)
+        self.client.force_authenticate(self.me)
+        response = self.client.get(reverse('follow-recommendations'))
+        self.assertEqual([item['username'] for item in response.data], ['d'])
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True, PROFILE_PICTURE_RENDITION_PROCESSES=0,
+)
+class ProfilePictureRenditionTestCase(APITestCase):
+    """
+    Tests for the profile picture rendition pipeline.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user(username='alice', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def _upload(self, size=(800, 600)):
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 255)).save(buffer, 'PNG')
+        return SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+
+    def test_render_crops_every_size_and_format(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200)).save(buffer, 'PNG')
+        rendered = render(buffer.getvalue(), {'small': 32, 'large': 128}, ('webp', 'jpeg'))
+        for name, edge in [('small', 32), ('large', 128)]:
+            for fmt, pillow_format in [('webp', 'WEBP'), ('jpeg', 'JPEG')]:
+                with Image.open(io.BytesIO(rendered[name][fmt])) as image:
+                    self.assertEqual((image.format, image.size), (pillow_format, (edge, edge)))
+
+    def test_upload_stores_renditions_and_serves_small_one(self):
+        response = self.client.patch(reverse('profile'), {'profile_picture': self._upload()}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        renditions = self.user.profile_picture_renditions
+        self.assertEqual(set(renditions), {'small', 'medium', 'large'})
+        self.assertEqual(set(renditions['small']), {'webp', 'jpeg'})
+        storage = self.user.profile_picture.storage
+        with storage.open(renditions['medium']['jpeg'][len(settings.MEDIA_URL):]) as f, Image.open(f) as image:
+            self.assertEqual(image.size, (256, 256))
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('profile'))
+        self.assertTrue(response.data['profile_picture'].endswith(renditions['small']['webp']))
+
+    def test_stale_job_does_not_overwrite_newer_picture(self):
+        with self.settings(BACKGROUND_TASKS_EAGER=False):
+            self.client.patch(reverse('profile'), {'profile_picture': self._upload()}, format='multipart')
+        self.user.refresh_from_db()
+        first = self.user.profile_picture.name
+        self.client.force_authenticate(self.user)
+        self.client.patch(reverse('profile'), {'profile_picture': self._upload((50, 50))}, format='multipart')
+        generate_renditions(self.user.pk, first)
+        self.user.refresh_from_db()
+        current = os.path.splitext(os.path.basename(self.user.profile_picture.name))[0]
+        self.assertNotEqual(current, os.path.splitext(os.path.basename(first))[0])
+        self.assertIn(f'/{current}_small.', self.user.profile_picture_renditions['small']['webp'])
@@ -1,10 +1,17 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView, FollowUserView, UnfollowUserView, Followuser, Unfollowuser
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import RegisterView, LoginView, ProfileView, FollowUserView, UnfollowUserView, Followuser, Unfollowuser, BulkFollowView, BulkUnfollowView, FollowRecommendationView, FollowerListView, FollowingListView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('<int:user_id>/followers/', FollowerListView.as_view(), name='user-followers'),
+    path('<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
+    path('recommendations/', FollowRecommendationView.as_view(), name='follow-recommendations'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
     path('followuser/<int:user_id>/', Followuser.as_view(), name='followuser'),
@@ -0,0 +1,17 @@
+"""
+Conditional GET versions for profiles (see social_media_api.conditional).
+
+A profile's version covers ``UserSerializer`` output: saves are caught here;
+``accounts.counters`` and ``accounts.renditions`` bump it for their
+queryset updates.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from social_media_api.conditional import bump
+
+
+@receiver(post_save, sender=get_user_model(), dispatch_uid='accounts_validator_saved')
+def _profile_changed(sender, instance, **kwargs):
+    bump('profile', [instance.pk])
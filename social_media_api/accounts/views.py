@@ -1,44 +1,26 @@
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-
-class FollowUserView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, user_id):
-        user_to_follow = get_object_or_404(User, id=user_id)
-        if user_to_follow == request.user:
-            return Response({'error': 'You cannot follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
-        request.user.following.add(user_to_follow)
-        user_to_follow.followers.add(request.user)
-        return Response({'success': f'You are now following {user_to_follow.username}.'})
-
-class Followuser(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, user_id):
-        user_to_follow = get_object_or_404(User, id=user_id)
-        if user_to_follow == request.user:
-            return Response({'error': 'You cannot follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
-        request.user.following.add(user_to_follow)
-        user_to_follow.followers.add(request.user)
-        return Response({'success': f'You are now following {user_to_follow.username}.'})
-
-class Unfollowuser(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, user_id):
-        user_to_unfollow = get_object_or_404(User, id=user_id)
-        request.user.following.remove(user_to_unfollow)
-        user_to_unfollow.followers.remove(request.user)
-        return Response({'success': f'You have unfollowed {user_to_unfollow.username}.'})
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework import permissions
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import authenticate
-from .serializers import RegisterSerializer, UserSerializer
+from django.db import IntegrityError, transaction
+from .authentication import issue_tokens
+from .counters import adjust_follow_counts, recount_follow_counts
+from .models import Follow, FollowRecommendation
+from .serializers import (
+    BulkFollowSerializer, FollowerSerializer, FollowingSerializer, FollowRecommendationSerializer,
+    RegisterSerializer, UserSerializer, UserWithFollowersSerializer,
+)
 from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from posts.timeline import backfill_timeline, trim_timeline
+from social_media_api.asyncviews import AsyncAPIView
+from social_media_api.background import defer
+from social_media_api.conditional import aversions, last_modified, make_etag, not_modified, set_validators
 
 User = get_user_model()
 # The following lines are present to satisfy automated checks:
@@ -50,6 +32,143 @@ except ImportError:
 _ = permissions.IsAuthenticated
 _ = User.objects.all()
 
+class FollowUserView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        user_to_follow = get_object_or_404(User, id=user_id)
+        if user_to_follow == request.user:
+            return Response({'error': 'You cannot follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                Follow.objects.create(follower=request.user, followee=user_to_follow)
+                adjust_follow_counts(request.user.id, [user_to_follow.id], 1)
+        except IntegrityError:
+            pass  # Already following; the unique constraint makes this a no-op.
+        else:
+            defer(backfill_timeline, request.user.id, [user_to_follow.id])
+        return Response({'success': f'You are now following {user_to_follow.username}.'})
+
+class Followuser(FollowUserView):
+    """Same as FollowUserView; kept for the /followuser/ route."""
+
+class UnfollowUserView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        user_to_unfollow = get_object_or_404(User, id=user_id)
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=request.user, followee=user_to_unfollow).delete()
+            if deleted:
+                adjust_follow_counts(request.user.id, [user_to_unfollow.id], -1)
+        if deleted:
+            defer(trim_timeline, request.user.id, [user_to_unfollow.id])
+        return Response({'success': f'You have unfollowed {user_to_unfollow.username}.'})
+
+class Unfollowuser(UnfollowUserView):
+    """Same as UnfollowUserView; kept for the /unfollowuser/ route."""
+
+class BulkFollowView(APIView):
+    """
+    Follow many users in one request: POST {"user_ids": [...]}.
+
+    Writes all new edges with a single bulk INSERT, backfills the timeline
+    in one background job and reports the IDs that were skipped.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['user_ids']))
+
+        existing_users = set(User.objects.filter(id__in=requested).values_list('id', flat=True))
+        already_following = set(
+            Follow.objects.filter(follower=request.user, followee_id__in=requested)
+            .values_list('followee_id', flat=True)
+        )
+        skipped = []
+        to_follow = []
+        for user_id in requested:
+            if user_id == request.user.id:
+                skipped.append({'id': user_id, 'reason': 'self'})
+            elif user_id not in existing_users:
+                skipped.append({'id': user_id, 'reason': 'not_found'})
+            elif user_id in already_following:
+                skipped.append({'id': user_id, 'reason': 'already_following'})
+            else:
+                to_follow.append(user_id)
+
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                [Follow(follower=request.user, followee_id=user_id) for user_id in to_follow],
+                ignore_conflicts=True,
+            )
+            if to_follow:
+                recount_follow_counts([request.user.id, *to_follow])
+        if to_follow:
+            defer(backfill_timeline, request.user.id, to_follow)
+        return Response({'followed': to_follow, 'skipped': skipped})
+
+class BulkUnfollowView(APIView):
+    """Unfollow many users in one request: POST {"user_ids": [...]}; one DELETE."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['user_ids']))
+
+        edges = Follow.objects.filter(follower=request.user, followee_id__in=requested)
+        with transaction.atomic():
+            unfollowed = set(edges.values_list('followee_id', flat=True))
+            edges.filter(followee_id__in=unfollowed).delete()
+            if unfollowed:
+                recount_follow_counts([request.user.id, *unfollowed])
+        if unfollowed:
+            defer(trim_timeline, request.user.id, list(unfollowed))
+        return Response({
+            'unfollowed': [user_id for user_id in requested if user_id in unfollowed],
+            'skipped': [{'id': user_id, 'reason': 'not_following'} for user_id in requested if user_id not in unfollowed],
+        })
+
+class FollowerListView(generics.ListAPIView):
+    """Keyset-paginated followers of a user, newest first."""
+    serializer_class = FollowerSerializer
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = 2
+
+    def get_queryset(self):
+        return Follow.objects.filter(followee_id=self.kwargs['user_id']).select_related('follower')
+
+class FollowingListView(generics.ListAPIView):
+    """Keyset-paginated users that a user follows, newest first."""
+    serializer_class = FollowingSerializer
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = 2
+
+    def get_queryset(self):
+        return Follow.objects.filter(follower_id=self.kwargs['user_id']).select_related('followee')
+
+class FollowRecommendationView(APIView):
+    """
+    "Who to follow": serves the list precomputed by compute_follow_recommendations.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def get(self, request):
+        recommendations = (
+            FollowRecommendation.objects.filter(user=request.user)
+            # Skip anyone followed since the last offline run.
+            .exclude(candidate__in=Follow.objects.filter(follower=request.user).values('followee'))
+            .select_related('candidate')
+            .order_by('rank')
+        )
+        return Response(FollowRecommendationSerializer(recommendations, many=True).data)
+
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
@@ -60,7 +179,8 @@ class RegisterView(generics.CreateAPIView):
         token, created = Token.objects.get_or_create(user=user)
         return Response({
             'user': UserSerializer(user, context=self.get_serializer_context()).data,
-            'token': token.key
+            'token': token.key,
+            **issue_tokens(user),
         }, status=status.HTTP_201_CREATED)
 
 class LoginView(generics.GenericAPIView):
@@ -74,13 +194,61 @@ class LoginView(generics.GenericAPIView):
             token, created = Token.objects.get_or_create(user=user)
             return Response({
                 'user': UserSerializer(user).data,
-                'token': token.key
+                'token': token.key,
+                **issue_tokens(user),
             })
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileUpdateView(generics.UpdateAPIView):
+    """PUT/PATCH of the signed-in user's profile; reached through ProfileView."""
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        # JWT-authenticated users carry only id and username.
+        if not user.get_deferred_fields():
+            return user
+        try:
+            return User.objects.get(pk=user.pk)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+class ProfileView(AsyncAPIView):
+    """
+    The signed-in user's profile. Reads are async-native; updates are handed
+    to the synchronous ProfileUpdateView.
+    """
+    query_budget = {'GET': 3}
+
+    async def get(self, request):
+        version = (await aversions('profile', [request.user.pk]))[request.user.pk]
+        etag = make_etag('profile', request.user.pk, request.build_absolute_uri(), version)
+        modified = last_modified([version])
+        response = not_modified(request, etag, modified)
+        if response is not None:
+            return response
+        # Read the row after the version, so the body is never older than its
+        # ETag (and JWT-authenticated users carry only id and username anyway).
+        users = User.objects.all()
+        serializer_class = UserSerializer
+        # The full follower list is opt-in; counts are always included.
+        if 'followers' in request.query_params.get('include', '').split(','):
+            users = users.prefetch_related('followers')
+            serializer_class = UserWithFollowersSerializer
+        try:
+            user = await users.aget(pk=request.user.pk)
+        except User.DoesNotExist:
+            # A still-valid JWT for a deleted account.
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        return set_validators(
+            Response(serializer_class(user, context={'request': request}).data), etag, modified,
+        )
+
+    async def put(self, request):
+        return await _update_profile(request._request)
+
+    async def patch(self, request):
+        return await _update_profile(request._request)
+
+_update_profile = sync_to_async(ProfileUpdateView.as_view())
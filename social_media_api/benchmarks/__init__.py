@@ -0,0 +1,61 @@
+"""
+Standalone benchmarks for social_media_api.
+
+Run from the project root (the directory containing manage.py), e.g.::
+
+    python -m benchmarks.pagination
+
+Each benchmark builds a throwaway test database, fills it with synthetic data
+and prints its measurements; the configured database is never touched.
+"""
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    # Views are called directly, but keep the environment close to a real request.
+    settings.SECURE_SSL_REDIRECT = False
+
+
+@contextlib.contextmanager
+def test_database(on_disk=False):
+    """
+    Create a fresh test database for the duration of the block.
+
+    SQLite test databases live in memory by default; pass ``on_disk=True``
+    when several threads need to write to the database concurrently.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if on_disk and connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+            tempfile.gettempdir(), 'social_media_api_bench.sqlite3',
+        )
+        # Take the write lock up front and wait for it, instead of failing
+        # with "database is locked" when two readers both try to upgrade.
+        connection.settings_dict['OPTIONS'].update(transaction_mode='IMMEDIATE', timeout=30)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=20):
+    """Return the median wall time of ``func()`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
@@ -0,0 +1,161 @@
+"""
+Concurrent slow clients against the async read endpoints: uvicorn vs. gunicorn.
+
+    python -m benchmarks.async_views [--clients 10 50 200] [--slow 1.0] [--duration 5]
+
+Starts each server on a throwaway SQLite database: ``uvicorn`` on the ASGI
+app (async views) and ``gunicorn`` exactly as in the Procfile (WSGI, one sync
+worker by default; pass ``--gunicorn-args`` to try threads or more workers).
+
+Over ``--duration`` seconds, ``--clients`` slow clients connect at a steady
+rate and each trickles its request headers over ``--slow`` seconds, the way a
+mobile client on a bad link does. Meanwhile ``--probes`` ordinary requests
+measure what everyone else sees. A sync worker is tied up for the whole
+trickle, so probes queue behind the slow clients once they outnumber its
+threads; the event loop keeps serving. Needs ``uvicorn`` and ``gunicorn``.
+"""
+import argparse
+import asyncio
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import setup_django
+
+SERVERS = {
+    'uvicorn': 'uvicorn social_media_api.asgi:application --host 127.0.0.1 --port {port} --log-level warning',
+    'gunicorn': 'gunicorn social_media_api.wsgi --bind 127.0.0.1:{port} --log-level warning {extra}',
+}
+
+
+def seed(posts):
+    """Migrate the benchmark database and give one user a full timeline; returns their token."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+
+    from posts.models import Post, TimelineEntry
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    reader = User.objects.create_user(username='reader', password='bench-pass-123')
+    author = User.objects.create_user(username='author', password='bench-pass-123')
+    created = Post.objects.bulk_create(
+        [Post(author=author, title=f'Post {i}', content='lorem ipsum') for i in range(posts)], batch_size=5000,
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user=reader, post=post, author=author, created_at=post.created_at)
+         for post in Post.objects.filter(pk__in=[post.pk for post in created]) if post.pk],
+        batch_size=5000,
+    )
+    return Token.objects.create(user=reader).key
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not start listening on port {port}')
+
+
+async def slow_request(port, path, token, slow, timeout):
+    """One GET whose headers are sent in two halves ``slow`` seconds apart; returns (status, seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode())
+        await writer.drain()
+        await asyncio.sleep(slow)
+        writer.write(f'Authorization: Token {token}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+        status = int(raw.split(b' ', 2)[1]) if raw else 0
+    finally:
+        writer.close()
+    return status, time.perf_counter() - start
+
+
+async def run_load(port, path, token, clients, slow, duration, probes, timeout):
+    """Returns (probe latencies, probe errors, slow-client errors, elapsed seconds)."""
+    async def request(delay, trickle):
+        await asyncio.sleep(delay)
+        try:
+            return await slow_request(port, path, token, trickle, timeout)
+        except (OSError, asyncio.TimeoutError):
+            return 0, None
+
+    start = time.perf_counter()
+    slow_results, probe_results = await asyncio.gather(
+        asyncio.gather(*(request(i * duration / clients, slow) for i in range(clients))),
+        asyncio.gather(*(request(i * duration / probes, 0) for i in range(probes))),
+    )
+    elapsed = time.perf_counter() - start
+    latencies = sorted(seconds for status, seconds in probe_results if status == 200)
+    slow_errors = sum(1 for status, _ in slow_results if status != 200)
+    return latencies, probes - len(latencies), slow_errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--slow', type=float, default=1.0, help='Seconds each slow client spends sending its headers.')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds over which clients and probes arrive.')
+    parser.add_argument('--probes', type=int, default=20)
+    parser.add_argument('--path', default='/api/feed/')
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--gunicorn-args', default='', help='Extra gunicorn flags, e.g. "--threads 8".')
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'async_views_bench.sqlite3')
+    os.environ['DB_NAME'] = database
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.server_settings'
+    setup_django()
+    token = seed(args.posts)
+
+    print(f'GET {args.path}: slow clients trickle headers over {args.slow}s, '
+          f'{args.probes} probes, over {args.duration}s')
+    print(f'{"server":<10}{"clients":>8}{"seconds":>9}{"probe p50":>11}{"probe p95":>11}'
+          f'{"probe max":>11}{"errors":>8}')
+    for name in args.servers:
+        port = free_port()
+        command = SERVERS[name].format(port=port, extra=args.gunicorn_args)
+        server = subprocess.Popen(shlex.split(command), env=os.environ.copy(), cwd=os.getcwd())
+        try:
+            wait_for_port(port)
+            for clients in args.clients:
+                latencies, probe_errors, slow_errors, elapsed = asyncio.run(run_load(
+                    port, args.path, token, clients, args.slow, args.duration, args.probes, args.timeout,
+                ))
+                if latencies:
+                    p50 = statistics.median(latencies) * 1000
+                    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000
+                    worst = latencies[-1] * 1000
+                else:
+                    p50 = p95 = worst = float('nan')
+                print(f'{name:<10}{clients:>8}{elapsed:>9.2f}{p50:>9.0f}ms{p95:>9.0f}ms{worst:>9.0f}ms'
+                      f'{probe_errors + slow_errors:>8}')
+        finally:
+            server.terminate()
+            server.wait()
+    os.remove(database)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Threaded stress test for LikePost on a single hot post.
+
+    python -m benchmarks.like_counters [--threads 8] [--likes 2000] [--modes row sharded buffered]
+
+Every thread likes the same post as a different user, so all increments
+target one counter. ``row`` updates Post.like_count directly and serialises
+on that row's lock; ``sharded`` spreads increments over
+POST_LIKE_COUNTER_SHARDS rows; ``buffered`` coalesces them in memory. The
+final total is checked after folding/flushing so lost updates would show up.
+
+SQLite serialises all writers on a database-level lock, so run this against
+Postgres (DB_ENGINE/DB_NAME/...) to see the row-lock contention this targets.
+"""
+import argparse
+import threading
+import time
+
+from . import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--likes', type=int, default=2000)
+    parser.add_argument('--modes', nargs='+', default=['row', 'sharded', 'buffered'])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from posts.counters import fold_like_shards, like_buffer
+    from posts.models import Post
+    from posts.views import LikePost
+
+    User = get_user_model()
+    factory = APIRequestFactory()
+    view = LikePost.as_view()
+
+    with test_database(on_disk=True):
+        author = User.objects.create_user(username='author', password='bench-pass-123')
+        users = User.objects.bulk_create(
+            [User(username=f'liker{i}', password='!') for i in range(args.likes)]
+        )
+        if not users[0].pk:
+            users = list(User.objects.exclude(pk=author.pk).order_by('pk'))
+
+        print(f'{args.likes} likes on one post from {args.threads} threads ({connection.vendor})')
+        print(f'{"mode":<10}{"seconds":>10}{"likes/s":>10}{"errors":>8}{"total":>8}')
+        for mode in args.modes:
+            post = Post.objects.create(author=author, title=mode, content='hot post')
+            errors = []
+
+            def worker(chunk):
+                for user in chunk:
+                    request = factory.post(f'/api/posts/{post.pk}/like/')
+                    force_authenticate(request, user=user)
+                    try:
+                        response = view(request, pk=post.pk)
+                        if response.status_code != 200:
+                            errors.append(response.status_code)
+                    except Exception as exc:
+                        errors.append(exc)
+                connection.close()
+
+            chunks = [users[i::args.threads] for i in range(args.threads)]
+            threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+            with override_settings(POST_LIKE_COUNTER_MODE=mode, BACKGROUND_TASKS_EAGER=True):
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                like_buffer.flush()
+                fold_like_shards()
+
+            post.refresh_from_db()
+            print(
+                f'{mode:<10}{elapsed:>10.2f}{args.likes / elapsed:>10.0f}'
+                f'{len(errors):>8}{post.like_count:>8}'
+            )
+
+
+if __name__ == '__main__':
+    main()
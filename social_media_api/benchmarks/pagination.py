@@ -0,0 +1,66 @@
+"""
+Keyset vs. offset pagination on PostViewSet.list.
+
+    python -m benchmarks.pagination [--pages 1000] [--page-size 20]
+
+Keyset latency should be flat between page 1 and the last page, while
+LIMIT/OFFSET grows with the page number because the database has to walk and
+discard every skipped row.
+"""
+import argparse
+
+from . import measure, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from rest_framework.pagination import LimitOffsetPagination
+    from rest_framework.test import APIRequestFactory
+
+    from posts.models import Post
+    from posts.views import PostViewSet
+    from social_media_api.pagination import KeysetPagination
+
+    with test_database():
+        author = get_user_model().objects.create_user(username='bench', password='bench-pass-123')
+        total = args.pages * args.page_size
+        Post.objects.bulk_create(
+            [Post(author=author, title=f'Post {i}', content='lorem ipsum') for i in range(total)],
+            batch_size=5000,
+        )
+
+        factory = APIRequestFactory()
+        keyset_view = PostViewSet.as_view({'get': 'list'})
+        offset_view = PostViewSet.as_view({'get': 'list'}, pagination_class=LimitOffsetPagination)
+
+        # Build the keyset cursor for the last page once, outside the timed loop.
+        ordering = PostViewSet.keyset_ordering
+        last_row = Post.objects.order_by(*ordering).values_list(
+            *(field.lstrip('-') for field in ordering)
+        )[(args.pages - 1) * args.page_size - 1]
+        last_cursor = KeysetPagination().encode_cursor(list(last_row))
+
+        def keyset(cursor=None):
+            params = {'page_size': args.page_size}
+            if cursor:
+                params['cursor'] = cursor
+            return lambda: keyset_view(factory.get('/api/posts/', params)).render()
+
+        def offset(page):
+            params = {'limit': args.page_size, 'offset': (page - 1) * args.page_size}
+            return lambda: offset_view(factory.get('/api/posts/', params)).render()
+
+        print(f'{total} posts, page size {args.page_size}')
+        print(f'{"strategy":<10}{"page 1 (ms)":>14}{f"page {args.pages} (ms)":>18}')
+        print(f'{"keyset":<10}{measure(keyset()):>14.2f}{measure(keyset(last_cursor)):>18.2f}')
+        print(f'{"offset":<10}{measure(offset(1)):>14.2f}{measure(offset(args.pages)):>18.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+DRF's JSONRenderer vs. the orjson renderer on 10k serialized rows.
+
+    python -m benchmarks.renderers [--rows 10000] [--books ../api_project ../advanced-api-project]
+
+Serializes ``--rows`` posts with ``PostSerializer`` once, then times rendering
+the result with each renderer and records the peak memory tracemalloc sees.
+Each ``--books`` project is run in a child process with its own settings.
+There, ``--rows`` unsaved ``Book`` instances go through its ``BookSerializer``
+and its own ``renderers.ORJSONRenderer``. A project whose dependencies are
+missing is reported and skipped.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tracemalloc
+
+from . import measure, setup_django, test_database
+
+
+def compare(label, data, renderers, repeat=5):
+    """Print encode time, peak memory and output size of ``data`` for each renderer."""
+    for renderer in renderers:
+        tracemalloc.start()
+        content = renderer.render(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        elapsed = measure(lambda: renderer.render(data), repeat=repeat)
+        print(
+            f'{label:<16}{type(renderer).__name__:<16}{elapsed:>10.2f}'
+            f'{peak / 2**20:>12.2f}{len(content) / 2**20:>12.2f}'
+        )
+
+
+def header():
+    print(f'{"rows":<16}{"renderer":<16}{"time (ms)":>10}{"peak (MiB)":>12}{"size (MiB)":>12}')
+
+
+def posts(rows):
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+
+    from posts.models import Post
+    from posts.serializers import PostSerializer
+    from social_media_api.renderers import ORJSONRenderer
+
+    with test_database():
+        author = get_user_model().objects.create_user(username='bench', password='bench-pass-123')
+        Post.objects.bulk_create(
+            [Post(author=author, title=f'Post {i}', content='lorem ipsum ' * 20) for i in range(rows)],
+            batch_size=5000,
+        )
+        request = APIRequestFactory().get('/api/posts/')
+        request.user = author
+        data = PostSerializer(
+            Post.objects.select_related('author').order_by('-created_at'), many=True, context={'request': request},
+        ).data
+        compare(f'{rows} posts', data, [JSONRenderer(), ORJSONRenderer()])
+
+
+def _dummy(field, i):
+    from django.db import models
+
+    if field.is_relation:
+        return i % 50 + 1
+    if isinstance(field, models.IntegerField):
+        return 1900 + i % 120
+    return f'{field.name} {i}'
+
+
+def books(project, rows):
+    """Child process: render ``rows`` books of ``project`` (a directory with manage.py)."""
+    sys.path.insert(0, project)
+    package = next(
+        name for name in os.listdir(project) if os.path.isfile(os.path.join(project, name, 'settings.py'))
+    )
+    os.environ['DJANGO_SETTINGS_MODULE'] = f'{package}.settings'
+    try:
+        import django
+        django.setup()
+    except ImportError as exc:
+        print(f'{os.path.basename(project)}: skipped ({exc})')
+        return
+    from importlib import import_module
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.serializers import BookSerializer
+
+    Book = BookSerializer.Meta.model
+    instances = []
+    for i in range(1, rows + 1):
+        book = Book(pk=i)
+        for field in Book._meta.concrete_fields:
+            if not field.primary_key:
+                setattr(book, field.attname, _dummy(field, i))
+        instances.append(book)
+    data = BookSerializer(instances, many=True).data
+    orjson_renderer = import_module(f'{package}.renderers').ORJSONRenderer
+    compare(f'{rows} books', data, [JSONRenderer(), orjson_renderer()])
+    print(f'{"":<16}({os.path.basename(project)})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--books', nargs='*', default=['../api_project', '../advanced-api-project'])
+    parser.add_argument('--books-child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.books_child:
+        books(args.books_child, args.rows)
+        return
+    header()
+    posts(args.rows)
+    for project in args.books:
+        # Separate process: one Django settings module per interpreter.
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.renderers', '--rows', str(args.rows),
+             '--books-child', os.path.abspath(project)],
+            check=False,
+        )
+
+
+if __name__ == '__main__':
+    main()
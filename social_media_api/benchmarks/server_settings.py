@@ -0,0 +1,6 @@
+"""Settings for servers started by benchmarks.async_views: plain HTTP on localhost."""
+from social_media_api.settings import *  # noqa: F401,F403
+
+SECURE_SSL_REDIRECT = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+DEBUG = False
@@ -0,0 +1,92 @@
+"""
+Peak memory of exporting every post and notification: one huge page vs. ``?stream=ndjson``.
+
+    python -m benchmarks.streaming [--rows 1000 10000 50000]
+
+For each size, the post list and the notification list are requested once
+with ``page_size`` covering every row (the keyset page-size cap is lifted for
+the run) and once streamed, consuming the stream chunk by chunk as a WSGI
+server would. tracemalloc records the peak for each, so a flat streaming
+column means memory no longer grows with the export.
+"""
+import argparse
+import time
+import tracemalloc
+
+from . import setup_django, test_database
+
+
+def peak(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='*', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    setup_django()
+    from asgiref.sync import async_to_sync
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from notifications.models import Notification
+    from notifications.views import NotificationList
+    from posts.models import Post
+    from posts.views import PostViewSet
+
+    settings.KEYSET_PAGINATION_MAX_PAGE_SIZE = max(args.rows)
+    factory = APIRequestFactory()
+    views = {
+        'posts': ('/api/posts/', PostViewSet.as_view({'get': 'list'})),
+        # Called from sync code, as the WSGI handler does.
+        'notifications': ('/api/notifications/', async_to_sync(NotificationList.as_view())),
+    }
+
+    def request(path, params, user):
+        request = factory.get(path, params)
+        force_authenticate(request, user)
+        return request
+
+    def page(name, rows, user):
+        path, view = views[name]
+        response = view(request(path, {'page_size': rows}, user))
+        return response.render() if hasattr(response, 'render') else response
+
+    def stream(name, user):
+        path, view = views[name]
+        return sum(len(chunk) for chunk in view(request(path, {'stream': 'ndjson'}, user)).streaming_content)
+
+    with test_database():
+        User = get_user_model()
+        author = User.objects.create_user(username='bench', password='bench-pass-123')
+        actor = User.objects.create_user(username='actor', password='bench-pass-123')
+        print(f'{"export":<15}{"rows":>8}{"page (ms)":>12}{"page (MiB)":>12}{"stream (ms)":>13}{"stream (MiB)":>14}')
+        created = 0
+        for rows in sorted(args.rows):
+            Post.objects.bulk_create(
+                [Post(author=author, title=f'Post {i}', content='lorem ipsum ' * 20) for i in range(created, rows)],
+                batch_size=5000,
+            )
+            Notification.objects.bulk_create(
+                [Notification(recipient=author, actor=actor, verb='followed you', sample_actors=[actor.pk])
+                 for _ in range(created, rows)],
+                batch_size=5000,
+            )
+            created = rows
+            for name in views:
+                page_time, page_peak = peak(lambda: page(name, rows, author))
+                stream_time, stream_peak = peak(lambda: stream(name, author))
+                print(f'{name:<15}{rows:>8}{page_time:>12.1f}{page_peak / 2**20:>12.2f}'
+                      f'{stream_time:>13.1f}{stream_peak / 2**20:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
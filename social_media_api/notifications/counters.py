@@ -0,0 +1,42 @@
+"""
+Cached unread notification counts on the recipient's user row.
+
+Everything that creates unread notifications or marks them read calls
+``adjust_unread_counts`` in the same transaction, so the unread badge is a
+column read instead of a COUNT. The reconcile_unread_counts command repairs
+any drift.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Notification
+
+
+def adjust_unread_counts(deltas):
+    """Apply ``{user_id: delta}``; one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    User = get_user_model()
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notification_count=Greatest(F('unread_notification_count') + delta, 0),
+        )
+
+
+def actual_unread_counts():
+    """Annotate users with their true number of unread notifications."""
+    return get_user_model().objects.annotate(actual_unread_notification_count=Coalesce(
+        Subquery(
+            Notification.objects.filter(recipient=OuterRef('pk'), unread=True)
+            .order_by()
+            .values('recipient')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.queue import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Drain queued notification events into Notification rows with batched inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events instead of exiting.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = deliver_pending(options['batch_size'])
+            if delivered or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} notification(s).'))
+            if not options['loop']:
+                return
+            if not delivered:
+                time.sleep(options['interval'])
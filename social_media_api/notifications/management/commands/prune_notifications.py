@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from notifications.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete read notifications outside the retention policy in small primary-key-ranged '
+        'chunks, optionally archiving them into monthly tables first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Primary keys covered per chunk.')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between chunks that deleted rows.')
+        parser.add_argument('--archive', action='store_true',
+                            help='Copy pruned rows into notifications_notification_archive_YYYYMM tables.')
+        parser.add_argument('--dry-run', action='store_true', help='Count expired notifications without deleting.')
+
+    def handle(self, *args, **options):
+        pruned = prune_notifications(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            archive=options['archive'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Found' if options['dry_run'] else 'Pruned'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {pruned} expired notification(s).'))
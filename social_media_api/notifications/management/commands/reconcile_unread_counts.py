@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from notifications.counters import actual_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute CustomUser.unread_notification_count and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        fixed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            drifted = list(
+                actual_unread_counts()
+                .filter(pk__in=batch)
+                .exclude(unread_notification_count=F('actual_unread_notification_count'))
+                .only('pk')
+            )
+            for user in drifted:
+                user.unread_notification_count = user.actual_unread_notification_count
+            if drifted and not options['dry_run']:
+                User.objects.bulk_update(drifted, ['unread_notification_count'])
+            fixed += len(drifted)
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} user(s) with drifted unread counts.'))
@@ -2,16 +2,63 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 class Notification(models.Model):
+    """
+    One notification, possibly standing for several actors.
+
+    Events sharing a collapse key (recipient, verb, target) within
+    ``NOTIFICATION_COALESCE_WINDOW`` are folded into one unread row: ``actor``
+    is the latest actor, ``actor_count`` the number of events and
+    ``sample_actors`` the ids of a few earlier actors, most recent first.
+    """
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications_from')
     verb = models.CharField(max_length=255)
     target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     target_object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey('target_content_type', 'target_object_id')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set explicitly when delivered from the queue so it keeps the time of the event.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     unread = models.BooleanField(default=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    sample_actors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            # NotificationList seeks on (timestamp, id) within one recipient.
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_recent'),
+            # Unread badge and mark-read-up-to scan only the unread rows.
+            models.Index(
+                fields=['recipient', '-timestamp', '-id'], condition=models.Q(unread=True),
+                name='notif_recipient_unread',
+            ),
+            # Coalescing looks up the latest row for a collapse key.
+            models.Index(
+                fields=['recipient', 'verb', 'target_content_type', 'target_object_id', '-timestamp'],
+                name='notif_collapse_key',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.actor} {self.verb} {self.target} to {self.recipient}'
+
+
+class NotificationEvent(models.Model):
+    """
+    A notification waiting in the database-backed queue.
+
+    Request handlers insert these via ``notifications.queue.notify``; the
+    ``deliver_notifications`` worker turns them into Notification rows in
+    batches and deletes them.
+    """
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    verb = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    target_object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.actor_id} {self.verb} to {self.recipient_id} (queued)'
@@ -0,0 +1,132 @@
+"""
+Publish/subscribe fan-out of delivered notifications to live streams.
+
+``publish`` is called from sync code (the delivery worker, after commit);
+``subscribe`` is used by the async SSE endpoint. The backend is chosen with
+``NOTIFICATION_PUBSUB_BACKEND``:
+
+``'notifications.pubsub.InMemoryPubSub'`` (default)
+    Per-process queues. Only streams served by the process that delivered
+    the notification see it directly; streams elsewhere fall back to polling
+    the database (``NOTIFICATION_STREAM_POLL_INTERVAL``).
+``'notifications.pubsub.RedisPubSub'``
+    Redis channels at ``NOTIFICATION_PUBSUB_REDIS_URL``, shared by every
+    worker and web process, so streams need no polling. Needs the ``redis``
+    package.
+
+Backends set ``shared`` to say whether a publish reaches every process.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from social_media_api.renderers import dumps
+
+
+class InMemoryPubSub:
+    """Thread-safe per-process pub/sub delivering to asyncio queues."""
+    shared = False
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    def has_subscribers(self, user_ids):
+        with self._lock:
+            return any(self._subscribers.get(user_id) for user_id in user_ids)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        try:
+            yield _QueueSubscription(subscriber[1])
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(subscriber)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+
+class _QueueSubscription:
+    def __init__(self, queue):
+        self._queue = queue
+
+    async def get(self, timeout):
+        """The next message, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisPubSub:
+    """Redis channels ``notifications:<user id>`` carrying JSON messages."""
+    shared = True
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisPubSub requires the redis package.')
+        self._url = getattr(settings, 'NOTIFICATION_PUBSUB_REDIS_URL', 'redis://localhost:6379/0')
+        self._client = redis.Redis.from_url(self._url)
+
+    def _channel(self, user_id):
+        return f'notifications:{user_id}'
+
+    def publish(self, user_id, message):
+        self._client.publish(self._channel(user_id), dumps(message))
+
+    def has_subscribers(self, user_ids):
+        # Counting subscribers costs a round trip per channel; just publish.
+        return True
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self._channel(user_id))
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return orjson.loads(message['data']) if message else None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_pubsub():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'NOTIFICATION_PUBSUB_BACKEND', 'notifications.pubsub.InMemoryPubSub')
+                _backend = import_string(path)()
+    return _backend
@@ -0,0 +1,237 @@
+"""
+Off-request-path notification delivery.
+
+Views call ``notify`` instead of creating Notification rows. Where the event
+goes is chosen by ``NOTIFICATION_QUEUE``:
+
+``'database'`` (default)
+    Insert a ``NotificationEvent`` in the caller's transaction, so the event
+    commits or rolls back with the action that caused it. The
+    ``deliver_notifications`` worker drains the table with ``bulk_create``.
+``'memory'``
+    Buffer events in process memory once the transaction commits and write
+    them in one ``bulk_create`` every ``NOTIFICATION_BUFFER_INTERVAL`` seconds
+    or ``NOTIFICATION_BUFFER_MAX_EVENTS`` events. Unflushed events are lost if
+    the process dies.
+
+Either way delivery goes through ``deliver``, which coalesces events sharing
+a (recipient, verb, target) collapse key into one notification.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counters import adjust_unread_counts
+from .models import Notification, NotificationEvent
+from .stream import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+
+def notification_queue_mode():
+    return getattr(settings, 'NOTIFICATION_QUEUE', 'database')
+
+
+def _batch_size():
+    return getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_SIZE', 500)
+
+
+def _collapse_key(event):
+    return (event['recipient_id'], event['verb'], event['target_content_type_id'], event['target_object_id'])
+
+
+def _merge(notification, event, samples):
+    """Fold ``event`` into ``notification``; the previous latest actor becomes a sample."""
+    if event['actor_id'] != notification.actor_id:
+        earlier = [notification.actor_id] + [a for a in notification.sample_actors if a != event['actor_id']]
+        notification.sample_actors = list(dict.fromkeys(earlier))[:samples]
+    notification.actor_id = event['actor_id']
+    notification.actor_count += 1
+    notification.timestamp = event['timestamp']
+    notification.unread = True
+
+
+def _in_or_null(field, values):
+    values = set(values)
+    condition = Q(**{f'{field}__in': values - {None}})
+    if None in values:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def _latest_unread(keys, since):
+    """
+    The newest unread notification since ``since`` for each collapse key, locked.
+
+    One OR'ed lookup per key overflows SQLite's expression depth at about a
+    thousand keys, so keys are looked up in chunks with one ``IN`` list per
+    column and the exact keys are matched here.
+    """
+    keys = sorted(keys, key=str)
+    # Recipient and object ids take a parameter per key; verbs and content types are few.
+    size = (connection.features.max_query_params or 3000) // 3
+    latest = {}
+    for start in range(0, len(keys), size):
+        chunk = set(keys[start:start + size])
+        candidates = (
+            Notification.objects.select_for_update()
+            .filter(
+                _in_or_null('target_content_type_id', (key[2] for key in chunk)),
+                _in_or_null('target_object_id', (key[3] for key in chunk)),
+                recipient_id__in={key[0] for key in chunk}, verb__in={key[1] for key in chunk},
+                unread=True, timestamp__gte=since,
+            )
+            .order_by('timestamp', 'id')
+        )
+        for notification in candidates:
+            key = (notification.recipient_id, notification.verb,
+                   notification.target_content_type_id, notification.target_object_id)
+            # Later rows overwrite earlier ones, leaving the newest per key.
+            if key in chunk:
+                latest[key] = notification
+    return latest
+
+
+def deliver(events):
+    """
+    Write ``events`` (dicts of Notification field values) with batched queries.
+
+    Events are coalesced by collapse key into the latest unread notification
+    less than ``NOTIFICATION_COALESCE_WINDOW`` seconds old, which is updated
+    in place; the rest become new rows.
+    """
+    if not events:
+        return 0
+    window = timedelta(seconds=getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 0))
+    samples = getattr(settings, 'NOTIFICATION_SAMPLE_ACTORS', 3)
+    events = sorted(events, key=lambda event: event['timestamp'])
+
+    with transaction.atomic():
+        latest = {}
+        if window:
+            latest = _latest_unread({_collapse_key(event) for event in events}, events[0]['timestamp'] - window)
+
+        updated, created = {}, []
+        for event in events:
+            key = _collapse_key(event)
+            notification = latest.get(key)
+            if window and notification is not None and event['timestamp'] - notification.timestamp <= window:
+                _merge(notification, event, samples)
+                if notification.pk is not None:
+                    updated[notification.pk] = notification
+            else:
+                latest[key] = Notification(**event)
+                created.append(latest[key])
+
+        Notification.objects.bulk_create(created, batch_size=_batch_size())
+        # Merges only touch rows that are already unread; new rows add to the badge.
+        adjust_unread_counts(Counter(notification.recipient_id for notification in created))
+        Notification.objects.bulk_update(
+            updated.values(), ['actor', 'actor_count', 'sample_actors', 'timestamp', 'unread'],
+            batch_size=_batch_size(),
+        )
+        notification_ids = [notification.pk for notification in created] + list(updated)
+        recipient_ids = {_collapse_key(event)[0] for event in events}
+        transaction.on_commit(lambda: publish_notifications(notification_ids, recipient_ids))
+    return len(events)
+
+
+class NotificationBuffer:
+    """Thread-safe in-process queue of notification events, flushed in batches."""
+
+    def __init__(self):
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, event):
+        with self._lock:
+            self._pending.append(event)
+            full = len(self._pending) >= getattr(settings, 'NOTIFICATION_BUFFER_MAX_EVENTS', 500)
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    getattr(settings, 'NOTIFICATION_BUFFER_INTERVAL', 1.0), self._flush_from_timer,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+        try:
+            return deliver(pending)
+        except Exception:
+            # Put the events back so the next flush retries them.
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Flushing buffered notifications failed')
+        finally:
+            connection.close()
+
+
+notification_buffer = NotificationBuffer()
+atexit.register(lambda: notification_buffer.flush() if notification_queue_mode() == 'memory' else None)
+
+
+def notify(recipient_id, actor_id, verb, target=None):
+    """Queue a notification for ``recipient_id``; it is written later, in a batch."""
+    event = {
+        'recipient_id': recipient_id,
+        'actor_id': actor_id,
+        'verb': verb,
+        'target_content_type_id': ContentType.objects.get_for_model(target).pk if target is not None else None,
+        'target_object_id': target.pk if target is not None else None,
+    }
+    # get_for_model is cached, so building the event costs no query after the first.
+    if notification_queue_mode() == 'memory':
+        transaction.on_commit(lambda: notification_buffer.add({**event, 'timestamp': timezone.now()}))
+    else:
+        NotificationEvent.objects.create(**event)
+
+
+def deliver_pending(batch_size=None):
+    """Drain queued ``NotificationEvent`` rows; returns the number delivered."""
+    batch_size = batch_size or _batch_size()
+    delivered = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked lets several workers drain the queue side by side.
+            events = list(
+                NotificationEvent.objects.select_for_update(skip_locked=True)
+                .order_by('pk')[:batch_size]
+            )
+            if not events:
+                return delivered
+            delivered += deliver([
+                {
+                    'recipient_id': event.recipient_id,
+                    'actor_id': event.actor_id,
+                    'verb': event.verb,
+                    'target_content_type_id': event.target_content_type_id,
+                    'target_object_id': event.target_object_id,
+                    'timestamp': event.created_at,
+                }
+                for event in events
+            ])
+            NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
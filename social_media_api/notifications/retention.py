@@ -0,0 +1,97 @@
+"""
+Notification retention.
+
+Read notifications expire when they are older than their verb's TTL
+(``NOTIFICATION_RETENTION_DAYS_BY_VERB``, falling back to
+``NOTIFICATION_RETENTION_DAYS``) or when the recipient has at least
+``NOTIFICATION_RETENTION_KEEP_LATEST`` newer notifications. Unread
+notifications are never pruned, so the unread counters stay exact.
+
+``prune_notifications`` walks the table in primary-key ranges and deletes each
+range in its own short transaction, optionally copying the rows into
+per-month archive tables (``notifications_notification_archive_YYYYMM``)
+first.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Notification
+
+
+def expired_notifications(now=None):
+    """Read notifications outside the retention policy (an empty queryset if none is configured)."""
+    now = now or timezone.now()
+    default_days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', None)
+    days_by_verb = getattr(settings, 'NOTIFICATION_RETENTION_DAYS_BY_VERB', {})
+    keep_latest = getattr(settings, 'NOTIFICATION_RETENTION_KEEP_LATEST', None)
+
+    expired = Q()
+    for verb, days in days_by_verb.items():
+        expired |= Q(verb=verb, timestamp__lt=now - timedelta(days=days))
+    if default_days is not None:
+        expired |= Q(timestamp__lt=now - timedelta(days=default_days)) & ~Q(verb__in=list(days_by_verb))
+    if keep_latest:
+        # Older than the recipient's Nth newest notification; one seek on
+        # notif_recipient_recent per row.
+        nth_newest = (
+            Notification.objects.filter(recipient=OuterRef('recipient'))
+            .order_by('-timestamp', '-id')
+            .values('timestamp')[keep_latest - 1:keep_latest]
+        )
+        expired |= Q(timestamp__lt=Subquery(nth_newest))
+    if not expired:
+        return Notification.objects.none()
+    return Notification.objects.filter(expired, unread=False)
+
+
+def archive_table(timestamp):
+    return f'{Notification._meta.db_table}_archive_{timestamp:%Y%m}'
+
+
+def _archive(rows):
+    """Copy ``rows`` (``(pk, timestamp)`` pairs) into their monthly archive tables."""
+    buckets = defaultdict(list)
+    for pk, timestamp in rows:
+        buckets[archive_table(timestamp)].append(pk)
+    source = connection.ops.quote_name(Notification._meta.db_table)
+    pk_column = connection.ops.quote_name(Notification._meta.pk.column)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in Notification._meta.concrete_fields)
+    with connection.cursor() as cursor:
+        for table, pks in buckets.items():
+            table = connection.ops.quote_name(table)
+            # An empty copy of the live table's columns; created on first use.
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} AS SELECT {columns} FROM {source} WHERE 1 = 0')
+            placeholders = ', '.join(['%s'] * len(pks))
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {source} WHERE {pk_column} IN ({placeholders})', pks,
+            )
+
+
+def prune_notifications(batch_size=1000, pause=0.1, archive=False, dry_run=False, now=None):
+    """Delete expired notifications chunk by chunk; returns the number of rows pruned."""
+    expired = expired_notifications(now)
+    bounds = Notification.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+    pruned = 0
+    low = bounds['low']
+    while low <= bounds['high']:
+        high = low + batch_size - 1
+        with transaction.atomic():
+            rows = list(expired.filter(pk__range=(low, high)).values_list('pk', 'timestamp'))
+            if rows and not dry_run:
+                if archive:
+                    _archive(rows)
+                Notification.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+        pruned += len(rows)
+        low = high + 1
+        if rows and pause and not dry_run:
+            # Let replication and other writers catch up between chunks.
+            time.sleep(pause)
+    return pruned
@@ -1,10 +1,65 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Notification
+from social_media_api.fastserializers import ValuesSerializer
+from .targets import summarize_target, summarize_targets
 
 class NotificationSerializer(serializers.ModelSerializer):
     actor = serializers.StringRelatedField()
     recipient = serializers.StringRelatedField()
+    sample_actors = serializers.SerializerMethodField()
+    target = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'actor', 'verb', 'target_content_type', 'target_object_id', 'timestamp', 'unread']
-        read_only_fields = ['id', 'recipient', 'actor', 'timestamp', 'unread']
+        fields = [
+            'id', 'recipient', 'actor', 'actor_count', 'sample_actors', 'verb',
+            'target_content_type', 'target_object_id', 'target', 'timestamp', 'unread',
+        ]
+        read_only_fields = ['id', 'recipient', 'actor', 'actor_count', 'timestamp', 'unread']
+
+    def get_sample_actors(self, obj):
+        # The list view resolves every page's sample ids with one query.
+        usernames = self.context.get('usernames')
+        if usernames is None:
+            usernames = dict(
+                get_user_model().objects.filter(pk__in=obj.sample_actors).values_list('pk', 'username')
+            )
+        return [usernames[pk] for pk in obj.sample_actors if pk in usernames]
+
+    def get_target(self, obj):
+        # NotificationList prefetches targets per content type (targets.target_prefetch).
+        return summarize_target(obj.target)
+
+class NotificationValuesSerializer(ValuesSerializer):
+    """NotificationSerializer's output from ``values_list`` rows (see social_media_api.fastserializers)."""
+    fields = {
+        'id': 'id', 'recipient': 'recipient__username', 'actor': 'actor__username',
+        'actor_count': 'actor_count', 'sample_actors': 'sample_actors', 'verb': 'verb',
+        'target_content_type': 'target_content_type_id', 'target_object_id': 'target_object_id',
+        'target': None, 'timestamp': 'timestamp', 'unread': 'unread',
+    }
+    datetime_fields = ('timestamp',)
+
+    def prepare(self, rows):
+        # Async views pass both maps in, fetched with the async ORM.
+        if 'usernames' not in self.context:
+            sample_ids = {pk for row in rows for pk in self.get(row, 'sample_actors')}
+            self.context['usernames'] = dict(
+                get_user_model().objects.filter(pk__in=sample_ids).values_list('pk', 'username')
+            ) if sample_ids else {}
+        if 'targets' not in self.context:
+            self.context['targets'] = summarize_targets(self.target_keys(rows))
+
+    def target_keys(self, rows):
+        return {(self.get(row, 'target_content_type_id'), self.get(row, 'target_object_id')) for row in rows}
+
+    def represent(self, item, row):
+        usernames = self.context['usernames']
+        item['sample_actors'] = [usernames[pk] for pk in item['sample_actors'] if pk in usernames]
+        item['target'] = self.context['targets'].get((item['target_content_type'], item['target_object_id']))
+        return item
+
+class MarkReadSerializer(serializers.Serializer):
+    # Newest notification the client has shown; omit to mark everything read.
+    up_to = serializers.IntegerField(required=False, min_value=1)
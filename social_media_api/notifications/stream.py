@@ -0,0 +1,163 @@
+"""
+Server-Sent Events stream of a user's notifications (``GET /api/notifications/stream/``).
+
+Delivery publishes every created or coalesced notification through
+``notifications.pubsub`` once its transaction commits; the async view relays
+them as SSE ``notification`` events. Each event id is a cursor over
+(timestamp, id), so a client reconnecting with ``Last-Event-ID`` first gets
+everything it missed from the database. A comment line is sent every
+``NOTIFICATION_STREAM_HEARTBEAT`` seconds to keep proxies from closing the
+connection.
+
+A per-process pub/sub backend (``InMemoryPubSub``) only sees notifications
+delivered by its own process, not those written by ``deliver_notifications``
+workers or other web processes. With such a backend the stream also polls the
+database every ``NOTIFICATION_STREAM_POLL_INTERVAL`` seconds for notifications
+after the last one it sent; a shared backend (``RedisPubSub``) needs no
+polling.
+
+Serve it over ASGI (``social_media_api.asgi``); under WSGI every open stream
+pins a worker thread.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+
+from social_media_api.asyncviews import authenticate
+from social_media_api.pagination import KeysetPagination
+from social_media_api.renderers import dumps
+
+from .models import Notification
+from .pubsub import get_pubsub
+from .serializers import NotificationSerializer
+from .targets import target_prefetch
+
+logger = logging.getLogger(__name__)
+
+# Events are replayed oldest first, so the cursor seeks forwards.
+_cursor = KeysetPagination(ordering=('timestamp', 'id'))
+# Milliseconds a disconnected EventSource waits before reconnecting.
+RECONNECT_DELAY = 3000
+
+
+def _serialize(notifications):
+    """``(recipient_id, event_id, data)`` for each notification, with batched lookups."""
+    notifications = list(
+        notifications.select_related('actor', 'recipient').prefetch_related(target_prefetch())
+    )
+    sample_ids = {pk for notification in notifications for pk in notification.sample_actors}
+    usernames = dict(
+        get_user_model().objects.filter(pk__in=sample_ids).values_list('pk', 'username')
+    ) if sample_ids else {}
+    data = NotificationSerializer(notifications, many=True, context={'usernames': usernames}).data
+    return [
+        (notification.recipient_id, _cursor.encode_cursor([notification.timestamp, notification.pk]), item)
+        for notification, item in zip(notifications, data)
+    ]
+
+
+def publish_notifications(notification_ids, recipient_ids):
+    """Publish freshly delivered notifications to any open streams of their recipients."""
+    pubsub = get_pubsub()
+    if not notification_ids or not pubsub.has_subscribers(recipient_ids):
+        return
+    try:
+        for recipient_id, event_id, data in _serialize(Notification.objects.filter(pk__in=notification_ids)):
+            pubsub.publish(recipient_id, {'id': event_id, 'data': data})
+    except Exception:
+        # Streams are best effort; clients resume from the database anyway.
+        logger.exception('Publishing notifications failed')
+
+
+def _missed_since(user, last_event_id):
+    """Notifications changed after ``last_event_id`` (all when None), oldest first (capped at one page)."""
+    notifications = Notification.objects.filter(recipient=user)
+    if last_event_id is not None:
+        try:
+            values = _cursor.clean_cursor(_cursor.parse_cursor(last_event_id), notifications)
+        except NotFound:
+            return []
+        notifications = notifications.filter(_cursor.seek_filter(values))
+    missed = notifications.order_by('timestamp', 'id')
+    return _serialize(missed[:getattr(settings, 'KEYSET_PAGINATION_MAX_PAGE_SIZE', 100)])
+
+
+def _start(user, last_event_id, poll):
+    """Missed notifications to replay, and the cursor polling continues from."""
+    notifications = Notification.objects.filter(recipient=user)
+    try:
+        _cursor.clean_cursor(_cursor.parse_cursor(last_event_id), notifications)
+    except (NotFound, TypeError):
+        last_event_id = None
+    if last_event_id is not None:
+        missed = _missed_since(user, last_event_id)
+        return missed, missed[-1][1] if missed else last_event_id
+    if not poll:
+        return [], None
+    # No usable Last-Event-ID: poll for whatever arrives after the newest one.
+    newest = notifications.order_by('-timestamp', '-id').values_list('timestamp', 'id').first()
+    return [], _cursor.encode_cursor(list(newest)) if newest else None
+
+
+def _format(event_id, data):
+    return f'id: {event_id}\nevent: notification\ndata: {dumps(data).decode()}\n\n'
+
+
+# Recently sent event ids, remembered to drop duplicates: pub/sub and polling
+# can both report the same notification.
+SENT_MEMORY = 1000
+
+
+async def _events(user, last_event_id):
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    pubsub = get_pubsub()
+    poll = None if getattr(pubsub, 'shared', False) else getattr(settings, 'NOTIFICATION_STREAM_POLL_INTERVAL', 2)
+    loop = asyncio.get_running_loop()
+    async with pubsub.subscribe(user.pk) as subscription:
+        # Subscribe before replaying so nothing published meanwhile is lost.
+        missed, cursor = await sync_to_async(_start)(user, last_event_id, poll)
+        yield f'retry: {RECONNECT_DELAY}\n\n'
+        events = [(event_id, data) for _, event_id, data in missed]
+        sent = {}
+        quiet_since = polled_at = loop.time()
+        while True:
+            for event_id, data in events:
+                if event_id not in sent:
+                    sent[event_id] = None
+                    if len(sent) > SENT_MEMORY:
+                        del sent[next(iter(sent))]
+                    quiet_since = loop.time()
+                    yield _format(event_id, data)
+            message = await subscription.get(timeout=min(heartbeat, poll) if poll else heartbeat)
+            events = [(message['id'], message['data'])] if message is not None else []
+            if poll and loop.time() - polled_at >= poll:
+                polled_at = loop.time()
+                polled = await sync_to_async(_missed_since)(user, cursor)
+                if polled:
+                    # Only database order advances the cursor; pub/sub messages may overtake it.
+                    cursor = polled[-1][1]
+                    events += [(event_id, data) for _, event_id, data in polled]
+            if not events and loop.time() - quiet_since >= heartbeat:
+                quiet_since = loop.time()
+                yield ': heartbeat\n\n'
+
+
+async def notification_stream(request):
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=401)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    response = StreamingHttpResponse(
+        _events(user, request.headers.get('Last-Event-ID')), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,109 @@
+"""
+Embedded summaries of ``Notification.target``.
+
+Apps register the models that can be notification targets together with the
+fields to expose. ``target_prefetch`` then resolves a whole page of targets
+with one ``in_bulk``-style query per content type (``GenericPrefetch``)
+instead of one query per notification::
+
+    register_target(Post, ['title'], Post.objects.only('id', 'title'))
+"""
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+
+_targets = {}
+_content_types_warm = False
+
+
+def register_target(model, fields, queryset=None):
+    """Expose ``fields`` of ``model`` in notification target summaries."""
+    global _content_types_warm
+    _targets[model] = (tuple(fields), queryset)
+    _content_types_warm = False
+
+
+def _warm_content_types():
+    # One query fills ContentType's per-process cache for every registered
+    # model, so get_for_id during prefetching never hits the database.
+    global _content_types_warm
+    if not _content_types_warm:
+        ContentType.objects.get_for_models(*_targets)
+        _content_types_warm = True
+
+
+def _prefetch():
+    querysets = [
+        queryset if queryset is not None else model._default_manager.all()
+        for model, (_, queryset) in _targets.items()
+    ]
+    return GenericPrefetch('target', querysets)
+
+
+def target_prefetch():
+    """A ``GenericPrefetch`` for ``target`` using each registered model's queryset."""
+    _warm_content_types()
+    return _prefetch()
+
+
+async def atarget_prefetch():
+    """``target_prefetch`` for async views; only the first call touches the database."""
+    if not _content_types_warm:
+        await sync_to_async(_warm_content_types)()
+    return _prefetch()
+
+
+def summarize_target(target):
+    """``{'type': 'app.model', 'id': ..., <registered fields>}``, or None if deleted."""
+    if target is None:
+        return None
+    fields, _ = _targets.get(type(target), ((), None))
+    summary = {'type': target._meta.label_lower, 'id': target.pk}
+    summary.update((field, getattr(target, field)) for field in fields)
+    return summary
+
+
+def _targets_by_type(keys):
+    """
+    ``(content type id, queryset)`` for each target type in ``keys``.
+
+    Content types are resolved here, eagerly, so async callers can run this
+    in ``sync_to_async``: ``get_for_id`` queries for any type not cached yet.
+    """
+    by_type = defaultdict(set)
+    for content_type_id, object_id in keys:
+        if content_type_id is not None and object_id is not None:
+            by_type[content_type_id].add(object_id)
+    targets = []
+    for content_type_id, object_ids in by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        _, queryset = _targets.get(model, ((), None))
+        queryset = queryset if queryset is not None else model._default_manager.all()
+        targets.append((content_type_id, queryset.filter(pk__in=object_ids)))
+    return targets
+
+
+def summarize_targets(keys):
+    """
+    Summaries for ``(content type id, object id)`` pairs, keyed by pair; one
+    query per content type. Deleted targets are simply absent.
+    """
+    _warm_content_types()
+    return {
+        (content_type_id, target.pk): summarize_target(target)
+        for content_type_id, targets in _targets_by_type(keys) for target in targets
+    }
+
+
+async def asummarize_targets(keys):
+    """``summarize_targets`` for async views."""
+    if not _content_types_warm:
+        await sync_to_async(_warm_content_types)()
+    return {
+        (content_type_id, target.pk): summarize_target(target)
+        for content_type_id, targets in await sync_to_async(_targets_by_type)(keys) async for target in targets
+    }
@@ -0,0 +1,387 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from social_media_api.testing import QueryBudgetTestMixin
+
+from posts.models import Comment, Post
+
+from .models import Notification, NotificationEvent
+from .queue import deliver, notification_buffer
+from .retention import archive_table
+from .stream import _cursor, publish_notifications
+from .views import MarkNotificationsRead, NotificationList, UnreadNotificationCount
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListTestCase(QueryBudgetTestMixin, APITestCase):
+    """
+    Tests for the notification list endpoint.
+    """
+    def setUp(self):
+        self.recipient = User.objects.create_user(username='recipient', password='pass12345')
+        for i in range(8):
+            actor = User.objects.create_user(username=f'actor{i}', password='pass12345')
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='followed you')
+        self.client.force_authenticate(self.recipient)
+
+    def test_list_within_query_budget(self):
+        with self.assertQueryBudget(NotificationList):
+            response = self.client.get(reverse('notifications'))
+        self.assertEqual(len(response.data['results']), 8)
+
+    def test_mixed_targets_resolve_in_constant_queries(self):
+        post = Post.objects.create(author=self.recipient, title='Hello', content='World')
+        comment = Comment.objects.create(post=post, author=self.recipient, content='Hi')
+        actor = User.objects.get(username='actor0')
+        for i in range(50):
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='mentioned you',
+                                        target=post if i % 2 else comment)
+        with self.assertQueryBudget(NotificationList):
+            response = self.client.get(reverse('notifications'), {'page_size': 58})
+        targets = [item['target'] for item in response.data['results']]
+        self.assertEqual(targets[0], {'type': 'posts.post', 'id': post.id, 'title': 'Hello'})
+        self.assertEqual(targets[1], {'type': 'posts.comment', 'id': comment.id, 'post_id': post.id})
+        self.assertEqual(targets[-1], None)
+
+    def test_fast_serializer_output_is_identical(self):
+        post = Post.objects.create(author=self.recipient, title='Hello', content='World')
+        comment = Comment.objects.create(post=post, author=self.recipient, content='Hi')
+        gone = Post.objects.create(author=self.recipient, title='Gone', content='...')
+        actors = list(User.objects.filter(username__startswith='actor'))
+        for i, target in enumerate([post, comment, gone, post]):
+            Notification.objects.create(
+                recipient=self.recipient, actor=actors[i], verb='liked your post', target=target,
+                actor_count=3, sample_actors=[actors[5].pk, actors[6].pk, 999999],
+            )
+        gone.delete()
+        for params in ({'page_size': 5}, {'page_size': 50}):
+            with self.settings(FAST_READ_SERIALIZERS=False):
+                slow = self.client.get(reverse('notifications'), params)
+            with self.settings(FAST_READ_SERIALIZERS=True), self.assertQueryBudget(NotificationList):
+                fast = self.client.get(reverse('notifications'), params)
+            self.assertEqual(fast.content, slow.content)
+
+    @override_settings(FAST_READ_SERIALIZERS=True)
+    async def test_async_list_resolves_uncached_content_types(self):
+        actor = await User.objects.aget(username='actor0')
+        await Notification.objects.acreate(recipient=self.recipient, actor=actor, verb='followed you', target=actor)
+        token = await Token.objects.acreate(user=self.recipient)
+        # An unregistered target type is not in the warmed ContentType cache.
+        ContentType.objects.clear_cache()
+        response = await self.async_client.get(
+            reverse('notifications'), headers={'Authorization': f'Token {token.key}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['target'], {'type': 'accounts.customuser', 'id': actor.pk})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationQueueTestCase(APITestCase):
+    """
+    Tests for queued notification delivery.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.likers = [User.objects.create_user(username=f'liker{i}', password='pass12345') for i in range(3)]
+
+    def like_as_everyone(self):
+        for liker in self.likers:
+            self.client.force_authenticate(liker)
+            self.client.post(reverse('like-post', args=[self.post.id]))
+
+    def test_like_only_enqueues_until_worker_runs(self):
+        self.like_as_everyone()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(NotificationEvent.objects.count(), 3)
+
+        out = StringIO()
+        call_command('deliver_notifications', batch_size=2, stdout=out)
+        self.assertIn('Delivered 3', out.getvalue())
+        self.assertFalse(NotificationEvent.objects.exists())
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.verb, notification.target), (self.author, 'liked your post', self.post))
+
+    @override_settings(NOTIFICATION_QUEUE='memory')
+    def test_memory_queue_writes_after_commit_in_one_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.like_as_everyone()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(notification_buffer.flush(), 3)
+        self.assertEqual(Notification.objects.get(recipient=self.author).actor_count, 3)
+
+    @override_settings(NOTIFICATION_SAMPLE_ACTORS=1)
+    def test_likes_coalesce_into_one_notification(self):
+        self.like_as_everyone()
+        call_command('deliver_notifications', batch_size=2, stdout=StringIO())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor, self.likers[2])
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.sample_actors, [self.likers[1].id])
+
+        self.client.force_authenticate(self.author)
+        response = self.client.get(reverse('notifications'))
+        [item] = response.data['results']
+        self.assertEqual((item['actor'], item['actor_count'], item['sample_actors']), ('liker2', 3, ['liker1']))
+
+    def test_read_or_stale_notifications_are_not_reused(self):
+        self.client.force_authenticate(self.likers[0])
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        call_command('deliver_notifications', stdout=StringIO())
+        Notification.objects.update(unread=False)
+        self.client.force_authenticate(self.likers[1])
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        with override_settings(NOTIFICATION_COALESCE_WINDOW=60):
+            NotificationEvent.objects.update(created_at=timezone.now() + timedelta(minutes=5))
+            self.client.force_authenticate(self.likers[2])
+            self.client.post(reverse('like-post', args=[self.post.id]))
+            call_command('deliver_notifications', stdout=StringIO())
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list('actor_count', 'unread')),
+            [(1, False), (1, True), (1, True)],
+        )
+
+    def test_coalesces_more_keys_than_sqlite_expression_depth(self):
+        content_type_id = ContentType.objects.get_for_model(Post).pk
+        events = [
+            {'recipient_id': self.author.pk, 'actor_id': liker.pk, 'verb': 'liked your post',
+             'target_content_type_id': content_type_id, 'target_object_id': object_id,
+             'timestamp': timezone.now()}
+            for liker in self.likers[:2] for object_id in range(1, 1201)
+        ]
+        untargeted = {'target_content_type_id': None, 'target_object_id': None}
+        deliver(events[:1200] + [{**events[0], **untargeted}])
+        deliver(events[1200:] + [{**events[1200], **untargeted}])
+        self.assertEqual(Notification.objects.count(), 1201)
+        self.assertEqual(Notification.objects.filter(actor_count=2, actor=self.likers[1]).count(), 1201)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadNotificationTestCase(QueryBudgetTestMixin, APITestCase):
+    """
+    Tests for the unread counter and bulk mark-as-read.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='pass12345')
+        self.actor = User.objects.create_user(username='actor', password='pass12345')
+        start = timezone.now()
+        deliver([
+            {'recipient_id': self.user.id, 'actor_id': self.actor.id, 'verb': f'event {i}',
+             'target_content_type_id': None, 'target_object_id': None, 'timestamp': start + timedelta(seconds=i)}
+            for i in range(3)
+        ])
+        self.oldest, self.middle, self.newest = Notification.objects.order_by('timestamp')
+        self.user.refresh_from_db()
+        self.client.force_authenticate(self.user)
+
+    def unread_count(self):
+        with self.assertQueryBudget(UnreadNotificationCount):
+            return self.client.get(reverse('notifications-unread-count')).data['unread']
+
+    def test_delivery_increments_counter(self):
+        self.assertEqual(self.unread_count(), 3)
+
+    def test_mark_read_up_to_cursor(self):
+        with self.assertQueryBudget(MarkNotificationsRead, method='POST'):
+            response = self.client.post(reverse('notifications-mark-read'), {'up_to': self.middle.id})
+        self.assertEqual(response.data, {'marked_read': 2, 'unread': 1})
+        self.assertEqual(list(Notification.objects.filter(unread=True)), [self.newest])
+
+        response = self.client.post(reverse('notifications-mark-read'))
+        self.assertEqual(response.data, {'marked_read': 1, 'unread': 0})
+
+    def test_mark_read_ignores_other_users_cursor(self):
+        other = User.objects.create_user(username='other', password='pass12345')
+        theirs = Notification.objects.create(recipient=other, actor=self.actor, verb='followed you')
+        response = self.client.post(reverse('notifications-mark-read'), {'up_to': theirs.id})
+        self.assertEqual(response.data, {'marked_read': 0, 'unread': 3})
+
+    def test_reconcile_command_fixes_drift(self):
+        User.objects.filter(pk=self.user.pk).update(unread_notification_count=10)
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('Fixed 1', out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.unread_notification_count, 3)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    NOTIFICATION_RETENTION_DAYS=90,
+    NOTIFICATION_RETENTION_DAYS_BY_VERB={'liked your post': 30},
+    NOTIFICATION_RETENTION_KEEP_LATEST=None,
+)
+class NotificationRetentionTestCase(APITestCase):
+    """
+    Tests for the prune_notifications retention command.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='pass12345')
+        self.actor = User.objects.create_user(username='actor', password='pass12345')
+
+    def notification(self, verb, days_ago, unread=False):
+        return Notification.objects.create(
+            recipient=self.user, actor=self.actor, verb=verb, unread=unread,
+            timestamp=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def prune(self, *args):
+        out = StringIO()
+        call_command('prune_notifications', '--batch-size=2', '--pause=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_per_verb_ttl_and_unread_are_respected(self):
+        expired_like = self.notification('liked your post', 40)
+        kept_follow = self.notification('followed you', 40)
+        expired_follow = self.notification('followed you', 100)
+        kept_unread = self.notification('liked your post', 100, unread=True)
+
+        self.assertIn('Found 2', self.prune('--dry-run'))
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertIn('Pruned 2', self.prune())
+        self.assertEqual(set(Notification.objects.all()), {kept_follow, kept_unread})
+        self.assertFalse(Notification.objects.filter(pk__in=[expired_like.pk, expired_follow.pk]).exists())
+
+    @override_settings(NOTIFICATION_RETENTION_DAYS=None, NOTIFICATION_RETENTION_DAYS_BY_VERB={},
+                       NOTIFICATION_RETENTION_KEEP_LATEST=2)
+    def test_keep_latest_per_user(self):
+        notifications = [self.notification('followed you', days_ago) for days_ago in (4, 3, 2, 1)]
+        self.assertIn('Pruned 2', self.prune())
+        self.assertEqual(list(Notification.objects.order_by('timestamp')), notifications[2:])
+
+    def test_archive_copies_rows_into_monthly_tables(self):
+        expired = self.notification('followed you', 100)
+        self.prune('--archive')
+        self.assertFalse(Notification.objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id, verb FROM {connection.ops.quote_name(archive_table(expired.timestamp))}')
+            self.assertEqual(cursor.fetchall(), [(expired.id, 'followed you')])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_STREAM_HEARTBEAT=0.05)
+class NotificationStreamTestCase(APITestCase):
+    """
+    Tests for the Server-Sent Events notification stream.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='pass12345')
+        self.actor = User.objects.create_user(username='actor', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+        start = timezone.now()
+        self.seen, self.missed = [
+            Notification.objects.create(recipient=self.user, actor=self.actor, verb=f'event {i}',
+                                        timestamp=start + timedelta(seconds=i))
+            for i in range(2)
+        ]
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('notifications-stream'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_resumes_then_relays_published_notifications_and_heartbeats(self):
+        last_event_id = _cursor.encode_cursor([self.seen.timestamp, self.seen.pk])
+        response = await self.async_client.get(
+            reverse('notifications-stream'),
+            headers={'Authorization': f'Token {self.token.key}', 'Last-Event-ID': last_event_id},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        try:
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            replayed = (await anext(chunks)).decode()
+            self.assertIn('event: notification', replayed)
+            self.assertIn('"verb":"event 1"', replayed)
+            self.assertEqual(await anext(chunks), b': heartbeat\n\n')
+
+            live = await sync_to_async(Notification.objects.create)(
+                recipient=self.user, actor=self.actor, verb='live event',
+            )
+            await sync_to_async(publish_notifications)([live.pk], {self.user.pk})
+            chunk = await anext(chunks)
+            while chunk == b': heartbeat\n\n':
+                chunk = await anext(chunks)
+            self.assertIn('"verb":"live event"', chunk.decode())
+        finally:
+            # streaming_content wraps the view's generator; close that one
+            # too so the subscription is released inside this event loop.
+            await chunks.aclose()
+            await response._iterator.aclose()
+
+    @override_settings(NOTIFICATION_STREAM_POLL_INTERVAL=0.01)
+    async def test_polls_for_notifications_delivered_by_other_processes(self):
+        response = await self.async_client.get(
+            reverse('notifications-stream'), headers={'Authorization': f'Token {self.token.key}'},
+        )
+        chunks = response.streaming_content
+        try:
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            # Written without publishing, as a deliver_notifications worker's
+            # publish never reaches this process's InMemoryPubSub.
+            await sync_to_async(Notification.objects.create)(
+                recipient=self.user, actor=self.actor, verb='from a worker',
+                timestamp=self.missed.timestamp + timedelta(seconds=1),
+            )
+            chunk = await anext(chunks)
+            while chunk == b': heartbeat\n\n':
+                chunk = await anext(chunks)
+            self.assertIn('"verb":"from a worker"', chunk.decode())
+            self.assertNotIn('event 1', chunk.decode())
+        finally:
+            await chunks.aclose()
+            await response._iterator.aclose()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, STREAMING_CHUNK_SIZE=3)
+class NotificationExportTestCase(APITestCase):
+    """
+    Tests for streaming every notification as a JSON array or NDJSON.
+    """
+    def setUp(self):
+        self.recipient = User.objects.create_user(username='recipient', password='pass12345')
+        self.token = Token.objects.create(user=self.recipient)
+        post = Post.objects.create(author=self.recipient, title='Hello', content='World')
+        for i in range(7):
+            actor = User.objects.create_user(username=f'actor{i}', password='pass12345')
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='liked your post',
+                                        target=post if i % 2 else None, sample_actors=[actor.pk])
+
+    async def export(self, **params):
+        response = await self.async_client.get(
+            reverse('notifications'), params, headers={'Authorization': f'Token {self.token.key}'},
+        )
+        self.assertTrue(response.streaming and response.is_async)
+        return response, b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_streams_every_notification_in_list_order(self):
+        self.client.force_authenticate(self.recipient)
+        expected = (await sync_to_async(self.client.get)(reverse('notifications'), {'page_size': 50})).json()
+        response, content = await self.export(stream='json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(content), expected['results'])
+
+        response, content = await self.export(stream='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in content.splitlines()], expected['results'])
+
+    def test_streams_synchronously_under_wsgi(self):
+        self.client.force_authenticate(self.recipient)
+        expected = self.client.get(reverse('notifications'), {'page_size': 50}).json()['results']
+        response = self.client.get(reverse('notifications'), {'stream': 'ndjson'})
+        # An async iterator would be buffered whole by the WSGI handler.
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import NotificationList
+from .stream import notification_stream
+from .views import MarkNotificationsRead, NotificationList, UnreadNotificationCount
 
 urlpatterns = [
     path('notifications/', NotificationList.as_view(), name='notifications'),
+    path('notifications/unread-count/', UnreadNotificationCount.as_view(), name='notifications-unread-count'),
+    path('notifications/mark-read/', MarkNotificationsRead.as_view(), name='notifications-mark-read'),
+    path('notifications/stream/', notification_stream, name='notifications-stream'),
 ]
@@ -1,13 +1,105 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q, Subquery
+from social_media_api.asyncviews import AsyncAPIView
+from social_media_api.fastserializers import fast_read_serializers
+from social_media_api.pagination import KeysetPagination
+from social_media_api.renderers import NDJSONRenderer
+from social_media_api.streaming import astream_rows, is_asgi, stream_format, stream_rows
+from .counters import adjust_unread_counts
 from .models import Notification
-from .serializers import NotificationSerializer
+from .targets import asummarize_targets, atarget_prefetch
+from .serializers import MarkReadSerializer, NotificationSerializer, NotificationValuesSerializer
 
-class NotificationList(APIView):
+class NotificationList(AsyncAPIView):
+    keyset_ordering = ('-timestamp', '-id')
+    # Page, sample actors, plus one target query per registered content type.
+    query_budget = 5
+
+    def get_renderers(self):
+        # Lets ?format=ndjson and Accept: application/x-ndjson negotiate; get() streams them.
+        return [*super().get_renderers(), NDJSONRenderer()]
+
+    async def get(self, request):
+        fmt = stream_format(request)
+        if fmt is not None:
+            # Exports: every notification, a chunk at a time, no pagination.
+            rows = NotificationValuesSerializer.values(
+                Notification.objects.filter(recipient=request.user).order_by(*self.keyset_ordering),
+            )
+            if is_asgi(request):
+                return astream_rows(rows, self.serialize_fast, fmt)
+            # WSGI buffers async iterators whole; iterate synchronously instead.
+            return stream_rows(rows, NotificationValuesSerializer, fmt)
+        if fast_read_serializers():
+            return await self.get_fast(request)
+        notifications = (
+            Notification.objects.filter(recipient=request.user)
+            .select_related('actor', 'recipient')
+            .prefetch_related(await atarget_prefetch())
+        )
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(notifications, request, view=self)
+        sample_ids = {pk for notification in page for pk in notification.sample_actors}
+        usernames = {
+            pk: username async for pk, username in
+            get_user_model().objects.filter(pk__in=sample_ids).values_list('pk', 'username')
+        } if sample_ids else {}
+        serializer = NotificationSerializer(page, many=True, context={'usernames': usernames})
+        return paginator.get_paginated_response(serializer.data)
+
+    async def get_fast(self, request):
+        rows = NotificationValuesSerializer.values(
+            Notification.objects.filter(recipient=request.user), extra=('timestamp', 'id'),
+        )
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response(await self.serialize_fast(page))
+
+    async def serialize_fast(self, rows):
+        serializer = NotificationValuesSerializer(rows)
+        sample_ids = {pk for row in rows for pk in row.sample_actors}
+        serializer.context['usernames'] = {
+            pk: username async for pk, username in
+            get_user_model().objects.filter(pk__in=sample_ids).values_list('pk', 'username')
+        } if sample_ids else {}
+        serializer.context['targets'] = await asummarize_targets(serializer.target_keys(rows))
+        return serializer.data
+
+class UnreadNotificationCount(APIView):
+    """Unread badge: reads the cached counter off the user row (a PK lookup at most)."""
     permission_classes = [IsAuthenticated]
+    query_budget = 1
 
     def get(self, request):
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-timestamp')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return Response({'unread': request.user.unread_notification_count})
+
+class MarkNotificationsRead(APIView):
+    """
+    POST {"up_to": <notification id>} marks that notification and every older
+    one read with a single UPDATE; without ``up_to`` everything is marked.
+    Notifications that arrived or were coalesced after ``up_to`` stay unread.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 5
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        up_to = serializer.validated_data.get('up_to')
+
+        unread = Notification.objects.filter(recipient=request.user, unread=True)
+        if up_to is not None:
+            # Same (timestamp, id) order as NotificationList, resolved inside the UPDATE.
+            timestamp = Subquery(
+                Notification.objects.filter(pk=up_to, recipient=request.user).values('timestamp')
+            )
+            unread = unread.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=up_to))
+        with transaction.atomic():
+            marked = unread.update(unread=False)
+            adjust_unread_counts({request.user.id: -marked})
+        request.user.refresh_from_db(fields=['unread_notification_count'])
+        return Response({'marked_read': marked, 'unread': request.user.unread_notification_count})
@@ -3,3 +3,15 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        # Registers the post_save/post_delete handlers that keep the search index in sync.
+        from . import search  # noqa: F401
+        # Likewise for the conditional GET versions of posts and the
+        # anonymous response cache.
+        from . import cache, validators  # noqa: F401
+
+        from notifications.targets import register_target
+        from .models import Comment, Post
+        register_target(Post, ['title'], Post.objects.only('id', 'title'))
+        register_target(Comment, ['post_id'], Comment.objects.only('id', 'post_id'))
@@ -0,0 +1,31 @@
+"""
+Invalidation of cached anonymous post and comment responses
+(see social_media_api.responsecache).
+
+Posts render their like and comment counts, so likes and comments invalidate
+the ``posts`` namespace as well as their own.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_media_api.responsecache import invalidate
+
+from .models import Comment, Like, Post
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_cache_post_saved')
+@receiver(post_delete, sender=Post, dispatch_uid='posts_cache_post_deleted')
+def _post_changed(sender, **kwargs):
+    invalidate('posts')
+
+
+@receiver(post_save, sender=Comment, dispatch_uid='posts_cache_comment_saved')
+@receiver(post_delete, sender=Comment, dispatch_uid='posts_cache_comment_deleted')
+def _comment_changed(sender, **kwargs):
+    invalidate('posts', 'comments')
+
+
+@receiver(post_save, sender=Like, dispatch_uid='posts_cache_like_saved')
+@receiver(post_delete, sender=Like, dispatch_uid='posts_cache_like_deleted')
+def _like_changed(sender, **kwargs):
+    invalidate('posts')
@@ -0,0 +1,212 @@
+"""
+Denormalized Post engagement counters.
+
+Counters are adjusted with a single ``UPDATE ... SET n = n + delta`` so
+concurrent likes and comments never lose increments, and serializers can read
+them straight off the row without COUNT queries.
+
+Likes on hot posts can be routed away from the single post row by setting
+``POST_LIKE_COUNTER_MODE``:
+
+``'row'`` (default)
+    Increment ``Post.like_count`` directly.
+``'sharded'``
+    Increment one of ``POST_LIKE_COUNTER_SHARDS`` ``PostLikeShard`` rows at
+    random; ``fold_like_shards`` later moves the totals onto the post row.
+``'buffered'``
+    Accumulate deltas in process memory and write them in one batch every
+    ``POST_LIKE_BUFFER_INTERVAL`` seconds or ``POST_LIKE_BUFFER_MAX_POSTS``
+    distinct posts. Unflushed deltas are lost if the process dies.
+
+In both write-behind modes ``pending_like_counts`` returns the not-yet-folded
+deltas so reads can still show exact totals.
+"""
+import atexit
+import logging
+import random
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from social_media_api.conditional import bump
+
+from .models import Comment, Like, Post, PostLikeShard
+
+logger = logging.getLogger(__name__)
+
+
+def like_counter_mode():
+    return getattr(settings, 'POST_LIKE_COUNTER_MODE', 'row')
+
+
+def _add_to_like_count(post_id, delta):
+    # Write-behind deltas can arrive out of order across processes (an unlike
+    # flushed before its like), and a drifted row counter can already be zero.
+    # Never go below zero: the CHECK constraint would fail the unlike or roll
+    # back the whole batch. reconcile_post_counts repairs the rest.
+    Post.objects.filter(pk=post_id).update(like_count=Greatest(F('like_count') + delta, 0))
+
+
+class LikeCountBuffer:
+    """Thread-safe in-process accumulator of like deltas, flushed in batches."""
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, post_id, delta):
+        with self._lock:
+            self._pending[post_id] += delta
+            full = len(self._pending) >= getattr(settings, 'POST_LIKE_BUFFER_MAX_POSTS', 500)
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    getattr(settings, 'POST_LIKE_BUFFER_INTERVAL', 1.0), self._flush_from_timer,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def pending(self, post_ids):
+        with self._lock:
+            return {post_id: self._pending[post_id] for post_id in post_ids if self._pending.get(post_id)}
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        pending = {post_id: delta for post_id, delta in pending.items() if delta}
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                for post_id, delta in pending.items():
+                    _add_to_like_count(post_id, delta)
+        except Exception:
+            # Put the deltas back so the next flush retries them.
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return len(pending)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Flushing buffered like counts failed')
+        finally:
+            connection.close()
+
+
+like_buffer = LikeCountBuffer()
+atexit.register(lambda: like_buffer.flush() if like_counter_mode() == 'buffered' else None)
+
+
+def _adjust_like_shard(post_id, delta):
+    shard = random.randrange(getattr(settings, 'POST_LIKE_COUNTER_SHARDS', 16))
+    shards = PostLikeShard.objects.filter(post_id=post_id, shard=shard)
+    if not shards.update(count=F('count') + delta):
+        PostLikeShard.objects.bulk_create(
+            [PostLikeShard(post_id=post_id, shard=shard)], ignore_conflicts=True,
+        )
+        shards.update(count=F('count') + delta)
+
+
+def adjust_like_count(post_id, delta):
+    # Like state and counts are part of the post's representation.
+    bump('post', [post_id])
+    mode = like_counter_mode()
+    if mode == 'sharded':
+        _adjust_like_shard(post_id, delta)
+    elif mode == 'buffered':
+        like_buffer.add(post_id, delta)
+    else:
+        _add_to_like_count(post_id, delta)
+
+
+def adjust_comment_count(post_id, delta):
+    bump('post', [post_id])
+    # Clamp at zero so a drifted counter can never make a comment delete fail.
+    Post.objects.filter(pk=post_id).update(comment_count=Greatest(F('comment_count') + delta, 0))
+
+
+def pending_like_counts(post_ids):
+    """Map post id to likes not yet folded into ``Post.like_count`` (one query at most)."""
+    mode = like_counter_mode()
+    if mode == 'sharded':
+        return dict(
+            PostLikeShard.objects.filter(post_id__in=post_ids)
+            .exclude(count=0)
+            .values('post_id')
+            .annotate(total=Sum('count'))
+            .values_list('post_id', 'total')
+        )
+    if mode == 'buffered':
+        return like_buffer.pending(post_ids)
+    return {}
+
+
+async def apending_like_counts(post_ids):
+    """``pending_like_counts`` for async views, using the async ORM."""
+    if like_counter_mode() == 'sharded':
+        return {
+            post_id: total async for post_id, total in
+            PostLikeShard.objects.filter(post_id__in=post_ids)
+            .exclude(count=0)
+            .values('post_id')
+            .annotate(total=Sum('count'))
+            .values_list('post_id', 'total')
+        }
+    return pending_like_counts(post_ids)
+
+
+def fold_like_shards(batch_size=1000):
+    """Move shard totals onto ``Post.like_count``; returns the number of posts updated."""
+    folded = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                PostLikeShard.objects.select_for_update()
+                .exclude(count=0)
+                .order_by('pk')
+                .values_list('pk', 'post_id', 'count')[:batch_size]
+            )
+            if not rows:
+                return folded
+            totals = defaultdict(int)
+            for shard_id, post_id, count in rows:
+                # Subtract what was read rather than zeroing, so increments
+                # that raced with this read are kept for the next fold.
+                PostLikeShard.objects.filter(pk=shard_id).update(count=F('count') - count)
+                totals[post_id] += count
+            for post_id, total in totals.items():
+                _add_to_like_count(post_id, total)
+        folded += len(totals)
+
+
+def _count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def actual_counts():
+    """Annotate posts with their true like and comment counts."""
+    return Post.objects.annotate(
+        actual_like_count=_count_subquery(Like),
+        actual_comment_count=_count_subquery(Comment),
+    )
@@ -1,17 +1,51 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import status
-from .models import Post
-from .serializers import PostSerializer
+from social_media_api.asyncviews import AsyncAPIView
+from social_media_api.conditional import aversions, make_etag, not_modified, set_validators
+from social_media_api.fastserializers import fast_read_serializers
+from social_media_api.pagination import KeysetPagination
+from .counters import apending_like_counts
+from .like import aliked_post_ids
+from .models import TimelineEntry
+from .serializers import PostSerializer, PostValuesSerializer
 
 
-class Feed(APIView):
-    permission_classes = [IsAuthenticated]
+class Feed(AsyncAPIView):
+    keyset_ordering = ('-created_at', '-post_id')
+    # Token, validator ids, timeline page, liked_by_me, pending like shards.
+    query_budget = 5
 
-    def get(self, request):
-        user = request.user
-        following_users = user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+    async def get(self, request):
+        # Read the materialized timeline (see posts.timeline) instead of
+        # filtering every followed author's posts on each request.
+        entries = TimelineEntry.objects.filter(user=request.user)
+        paginator = KeysetPagination()
+        # Validator: the page's post ids (newest first, plus the one that
+        # decides "next") and their cached versions; no join, no serializing.
+        post_ids = [
+            post_id async for post_id in
+            paginator.page_slice(entries, request, view=self).values_list('post_id', flat=True)
+        ]
+        post_versions = await aversions('post', post_ids)
+        etag = make_etag('feed', request.user.pk, request.build_absolute_uri(), post_ids, post_versions)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        if fast_read_serializers():
+            rows = PostValuesSerializer.values(entries, prefix='post__', extra=('created_at', 'post_id'))
+            page = await paginator.apaginate_queryset(rows, request, view=self)
+            post_ids = [row.post_id for row in page]
+            context = {
+                'pending': await apending_like_counts(post_ids),
+                'liked': await aliked_post_ids(request.user, post_ids),
+            }
+            data = PostValuesSerializer(page, context=context, prefix='post__').data
+            return set_validators(paginator.get_paginated_response(data), etag)
+        page = await paginator.apaginate_queryset(entries.select_related('post__author'), request, view=self)
+        posts = [entry.post for entry in page]
+        post_ids = [post.pk for post in posts]
+        pending = await apending_like_counts(post_ids)
+        liked = await aliked_post_ids(request.user, post_ids)
+        for post in posts:
+            post.pending_like_count = pending.get(post.pk, 0)
+            post.liked_by_me = post.pk in liked
+        serializer = PostSerializer(posts, many=True, context={'request': request})
+        return set_validators(paginator.get_paginated_response(serializer.data), etag)
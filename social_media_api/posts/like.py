@@ -1,13 +1,23 @@
-from django.db import models
-from django.conf import settings
+# Like lives in posts.models so Django registers it exactly once; this module
+# keeps the historical ``posts.like`` import path working.
+from .models import Like
 
-class Like(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
-    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='likes')
-    created_at = models.DateTimeField(auto_now_add=True)
+__all__ = ['Like', 'aliked_post_ids', 'liked_post_ids']
 
-    class Meta:
-        unique_together = ('user', 'post')
 
-    def __str__(self):
-        return f'{self.user} likes {self.post}'
+def _likes(user, post_ids):
+    return Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+
+
+def liked_post_ids(user, post_ids):
+    """The ids among ``post_ids`` that ``user`` has liked, in one query; empty for anonymous users."""
+    if user is None or not user.is_authenticated or not post_ids:
+        return set()
+    return set(_likes(user, post_ids))
+
+
+async def aliked_post_ids(user, post_ids):
+    """``liked_post_ids`` for async views."""
+    if user is None or not user.is_authenticated or not post_ids:
+        return set()
+    return {post_id async for post_id in _likes(user, post_ids)}
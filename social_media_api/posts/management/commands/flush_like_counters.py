@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import fold_like_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded like counters into Post.like_count (run periodically in sharded mode).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        folded = fold_like_shards(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Folded like shards for {folded} post(s).'))
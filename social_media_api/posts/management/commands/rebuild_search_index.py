@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-index every post in the full-text search backend (e.g. after bulk imports).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        indexed = 0
+        for post in Post.objects.only('id', 'title', 'content').iterator(chunk_size=options['batch_size']):
+            backend.index(post)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} post(s) with {type(backend).__name__}.'))
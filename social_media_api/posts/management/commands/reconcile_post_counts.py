@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts.counters import actual_counts, fold_like_shards
+from posts.models import Post
+from social_media_api.conditional import bump
+from social_media_api.responsecache import invalidate
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.like_count and Post.comment_count and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if not options['dry_run']:
+            # Pending shard deltas are part of the true count; fold them first
+            # so they are not applied twice.
+            fold_like_shards(batch_size)
+        fixed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            drifted = list(
+                actual_counts()
+                .filter(pk__in=batch)
+                .filter(~Q(like_count=F('actual_like_count')) | ~Q(comment_count=F('actual_comment_count')))
+                .only('pk')
+            )
+            for post in drifted:
+                post.like_count = post.actual_like_count
+                post.comment_count = post.actual_comment_count
+            if drifted and not options['dry_run']:
+                Post.objects.bulk_update(drifted, ['like_count', 'comment_count'])
+                bump('post', [post.pk for post in drifted])
+                invalidate('posts')
+            fixed += len(drifted)
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} post(s) with drifted counters.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from social_media_api.responsecache import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit, miss and invalidation counts of the anonymous response cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after reporting them.')
+
+    def handle(self, *args, **options):
+        counts = stats()
+        lookups = counts['hits'] + counts['misses']
+        ratio = f'{counts["hits"] / lookups:.1%}' if lookups else 'n/a'
+        self.stdout.write(
+            f'hits={counts["hits"]} misses={counts["misses"]} '
+            f'invalidations={counts["invalidations"]} hit_ratio={ratio}'
+        )
+        if options['reset']:
+            reset_stats()
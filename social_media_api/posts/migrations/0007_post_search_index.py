@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+PG_INDEX = 'posts_post_search_gin'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # No FTS5 in this SQLite build; posts.search falls back to icontains.
+                return
+        schema_editor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, content)')
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post'
+        )
+    elif connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+        Post = apps.get_model('posts', 'Post')
+        # Same expression as posts.search.PostgresSearchBackend.vector().
+        schema_editor.add_index(
+            Post, GinIndex(SearchVector('title', 'content', config='english'), name=PG_INDEX),
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_postlikeshard'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
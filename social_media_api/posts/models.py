@@ -1,13 +1,3 @@
-class Like(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
-    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='likes')
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        unique_together = ('user', 'post')
-
-    def __str__(self):
-        return f'{self.user} likes {self.post}'
 from django.db import models
 from django.conf import settings
 
@@ -17,6 +7,16 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized engagement counters, maintained with F() updates by
+    # posts.counters and repaired by the reconcile_post_counts command.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id); see social_media_api.pagination.
+            models.Index(fields=['-created_at', '-id'], name='posts_post_recent'),
+        ]
 
     def __str__(self):
         return self.title
@@ -28,5 +28,68 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_comment_recent'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author} on {self.post}'
+
+class Like(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='likes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'post')
+
+    def __str__(self):
+        return f'{self.user} likes {self.post}'
+
+class PostLikeShard(models.Model):
+    """
+    One of ``POST_LIKE_COUNTER_SHARDS`` partial like counters for a post.
+
+    In sharded counter mode likes increment a random shard instead of the post
+    row, so a hot post spreads lock contention over N rows. Shards are folded
+    back into ``Post.like_count`` by the flush_like_counters command; ``count``
+    may go negative when an unlike lands on a different shard than its like.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='like_shards')
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'shard'], name='posts_likeshard_post_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.post} like shard {self.shard}: {self.count}'
+
+class TimelineEntry(models.Model):
+    """
+    One row of a user's materialized home timeline.
+
+    Rows are written when a followed author publishes (fan-out on write) so the
+    feed is a single range read on (user, created_at) instead of a scan over
+    every followed author's posts. ``author`` and ``created_at`` are copied from
+    the post so unfollow trims and feed ordering never touch the posts table.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='posts_timeline_user_post_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_timeline_user_recent'),
+            models.Index(fields=['user', 'author'], name='posts_timeline_user_author'),
+        ]
+
+    def __str__(self):
+        return f'{self.post} in timeline of {self.user}'
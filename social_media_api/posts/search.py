@@ -0,0 +1,154 @@
+"""
+Pluggable full-text search for posts.
+
+``get_search_backend()`` picks an implementation for the default database:
+
+* SQLite: an FTS5 table ``posts_post_fts`` (rowid = post id) kept in sync by
+  the post_save/post_delete handlers below and ranked with ``bm25``.
+* PostgreSQL: a GIN expression index on the title/content tsvector (created
+  by migration 0007), ranked with ``ts_rank``. The index is maintained by
+  PostgreSQL itself, so ``index``/``remove`` are no-ops.
+* Anything else: the old ``icontains`` scan, newest first.
+
+Every backend's ``search`` returns the queryset annotated with
+``search_rank`` (higher is better) so callers can order and paginate on it.
+"""
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+
+class IContainsSearchBackend:
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def search(self, queryset, query):
+        terms = query.split()
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(content__icontains=term)
+        return queryset.filter(condition).annotate(search_rank=Value(0.0))
+
+
+class SQLiteFTS5SearchBackend:
+    @staticmethod
+    def to_match_expression(query):
+        # Quote every term so user input can never be parsed as FTS5 syntax;
+        # space-separated phrases are ANDed together like plainto_tsquery.
+        return ' '.join('"%s"' % term.replace('"', '""') for term in query.split())
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def search(self, queryset, query):
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[self.to_match_expression(query)],
+        ).annotate(search_rank=RawSQL(f'-bm25({FTS_TABLE})', ()))
+
+
+class PostgresSearchBackend:
+    config = 'english'
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+        # Must match the indexed expression in migration 0007 exactly.
+        return SearchVector('title', 'content', config=self.config)
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        search_query = SearchQuery(query, config=self.config)
+        return (
+            queryset.annotate(search_document=self.vector())
+            .filter(search_document=search_query)
+            .annotate(search_rank=SearchRank(F('search_document'), search_query))
+        )
+
+
+def _fts5_table_exists():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+@lru_cache(maxsize=None)
+def _backend_for(vendor, name):
+    # ``name`` only keys the cache: another database may lack the FTS5 table.
+    if vendor == 'sqlite' and _fts5_table_exists():
+        return SQLiteFTS5SearchBackend()
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return IContainsSearchBackend()
+
+
+def get_search_backend():
+    return _backend_for(connection.vendor, connection.settings_dict['NAME'])
+
+
+@receiver(setting_changed, dispatch_uid='posts_search_setting_changed')
+def reset_search_backend(setting, **kwargs):
+    if setting == 'DATABASES':
+        _backend_for.cache_clear()
+
+
+@receiver(post_migrate, dispatch_uid='posts_search_post_migrate')
+def reset_search_backend_after_migrate(**kwargs):
+    # The FTS5 table may have just been created (or dropped).
+    _backend_for.cache_clear()
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """
+    Ranked full-text search on ``?search=``; replaces DRF's SearchFilter for posts.
+
+    Results are ordered by relevance, and keyset pagination seeks on
+    (search_rank, id) while a search is active.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        view.keyset_ordering = ('-search_rank', '-id')
+        return get_search_backend().search(queryset, query).order_by('-search_rank', '-id')
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_search_index')
+def index_post(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post, dispatch_uid='posts_search_remove')
+def remove_post(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
@@ -1,13 +1,88 @@
+from django.conf import settings
 from rest_framework import serializers
+from social_media_api.fastserializers import ValuesSerializer
+from .counters import pending_like_counts
+from .like import liked_post_ids
 from .models import Post, Comment
 
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Fetch write-behind like deltas for the whole page in one query.
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        # Async views attach the counts beforehand (see apending_like_counts).
+        missing = [post for post in posts if not hasattr(post, 'pending_like_count')]
+        if missing:
+            pending = pending_like_counts([post.pk for post in missing])
+            for post in missing:
+                post.pending_like_count = pending.get(post.pk, 0)
+        # One Like lookup for the whole page rather than one per post.
+        missing = [post for post in posts if not hasattr(post, 'liked_by_me')]
+        if missing:
+            request = self.context.get('request')
+            liked = liked_post_ids(getattr(request, 'user', None), [post.pk for post in missing])
+            for post in missing:
+                post.liked_by_me = post.pk in liked
+        return super().to_representation(posts)
+
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+        fields = [
+            'id', 'author', 'title', 'content', 'like_count', 'comment_count', 'liked_by_me',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'author', 'like_count', 'comment_count', 'created_at', 'updated_at']
+        list_serializer_class = PostListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        pending = getattr(instance, 'pending_like_count', None)
+        if pending is None:
+            pending = pending_like_counts([instance.pk]).get(instance.pk, 0)
+        data['like_count'] += pending
+        return data
+
+    def get_liked_by_me(self, obj):
+        liked = getattr(obj, 'liked_by_me', None)
+        if liked is None:
+            request = self.context.get('request')
+            liked = obj.pk in liked_post_ids(getattr(request, 'user', None), [obj.pk])
+        return liked
+
+class PostValuesSerializer(ValuesSerializer):
+    """PostSerializer's output from ``values_list`` rows (see social_media_api.fastserializers)."""
+    fields = {
+        'id': 'id', 'author': 'author__username', 'title': 'title', 'content': 'content',
+        'like_count': 'like_count', 'comment_count': 'comment_count', 'liked_by_me': None,
+        'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    datetime_fields = ('created_at', 'updated_at')
+
+    def prepare(self, rows):
+        # Async views pass both maps in, fetched with the async ORM.
+        post_ids = [self.get(row, 'id') for row in rows]
+        if 'pending' not in self.context:
+            self.context['pending'] = pending_like_counts(post_ids)
+        if 'liked' not in self.context:
+            request = self.context.get('request')
+            self.context['liked'] = liked_post_ids(getattr(request, 'user', None), post_ids)
+
+    def represent(self, item, row):
+        item['like_count'] += self.context['pending'].get(item['id'], 0)
+        item['liked_by_me'] = item['id'] in self.context['liked']
+        return item
+
+class LikedPostsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, value):
+        limit = getattr(settings, 'LIKED_BY_ME_MAX_IDS', 100)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Ensure this field has no more than {limit} elements.')
+        return value
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
@@ -17,3 +92,11 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+
+class CommentValuesSerializer(ValuesSerializer):
+    """CommentSerializer's output from ``values_list`` rows."""
+    fields = {
+        'id': 'id', 'post': 'post_id', 'author': 'author__username', 'content': 'content',
+        'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    datetime_fields = ('created_at', 'updated_at')
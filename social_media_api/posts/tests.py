@@ -0,0 +1,538 @@
+import base64
+import json
+import time
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import setting_changed
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import Follow
+from social_media_api.responsecache import stats
+from social_media_api.testing import QueryBudgetTestMixin
+
+from .counters import adjust_comment_count, adjust_like_count, like_buffer
+from .feed import Feed
+from .models import Comment, Like, Post, PostLikeShard, TimelineEntry
+from .search import get_search_backend
+from .timeline import backfill_timeline, fan_out_post
+from .views import CommentViewSet, PostViewSet
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class TimelineTestCase(APITestCase):
+    """
+    Tests for the fan-out-on-write home timeline behind the Feed endpoint.
+    """
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.carol = User.objects.create_user(username='carol', password='pass12345')
+
+    def follow(self, follower, followee):
+        self.client.force_authenticate(follower)
+        return self.client.post(reverse('follow-user', args=[followee.id]))
+
+    def test_new_post_fans_out_to_followers(self):
+        self.follow(self.bob, self.alice)
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(reverse('post-list'), {'title': 'Hello', 'content': 'World'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.bob, post_id=response.data['id']).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.carol).exists())
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        Post.objects.create(author=self.alice, title='Old', content='post')
+        self.follow(self.bob, self.alice)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.bob).count(), 1)
+        self.client.post(reverse('unfollowuser', args=[self.alice.id]))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.bob).exists())
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_backfill_reads_every_author_in_one_query(self):
+        authors = [self.alice, self.carol]
+        posts = [Post.objects.create(author=author, title=str(i), content='...') for author in authors for i in range(3)]
+        for author in authors:
+            Follow.objects.create(follower=self.bob, followee=author)
+        # Posts, insert, and the unfollowed-edge cleanup.
+        with self.assertNumQueries(3):
+            backfill_timeline(self.bob.id, [author.id for author in authors])
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=self.bob).values_list('post_id', flat=True)),
+            {post.id for post in posts[1:3] + posts[4:6]},
+        )
+
+    def test_late_backfill_and_fan_out_skip_unfollowed_authors(self):
+        post = Post.objects.create(author=self.alice, title='Old', content='post')
+        self.follow(self.bob, self.alice)
+        self.follow(self.carol, self.alice)
+        self.client.force_authenticate(self.bob)
+        self.client.post(reverse('unfollowuser', args=[self.alice.id]))
+        # Tasks queued before the unfollow, running after its trim.
+        backfill_timeline(self.bob.id, [self.alice.id])
+        fan_out_post(post.id)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.bob).exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.carol, post=post).exists())
+
+    def test_feed_reads_timeline_newest_first(self):
+        self.follow(self.bob, self.alice)
+        self.follow(self.bob, self.carol)
+        self.client.force_authenticate(self.alice)
+        self.client.post(reverse('post-list'), {'title': 'First', 'content': '1'})
+        self.client.force_authenticate(self.carol)
+        self.client.post(reverse('post-list'), {'title': 'Second', 'content': '2'})
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['title'] for post in response.data['results']], ['Second', 'First'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTestCase(APITestCase):
+    """
+    Tests for cursor pagination on the post list endpoint.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='...')
+            for i in range(5)
+        ]
+
+    def test_pages_follow_cursor_without_overlap(self):
+        response = self.client.get(reverse('post-list'), {'page_size': 2})
+        seen = [post['id'] for post in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(post['id'] for post in response.data['results'])
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('post-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_values_are_not_found(self):
+        self.client.force_authenticate(self.author)
+        for values in (['notadate', 'x'], [None, 1], [{}, []]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            for name, params in (('post-list', {}), ('post-list', {'search': 'Post'}),
+                                 ('feed', {}), ('notifications', {})):
+                response = self.client.get(reverse(name), {'cursor': cursor, **params})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, (values, name, params))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EngagementCountTestCase(APITestCase):
+    """
+    Tests for the denormalized like_count and comment_count columns.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Counted', content='...')
+        self.client.force_authenticate(self.reader)
+
+    def test_like_and_unlike_adjust_like_count(self):
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.client.post(reverse('unlike-post', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_adjust_comment_count(self):
+        response = self.client.post(reverse('comment-list'), {'post': self.post.id, 'content': 'Nice'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.client.delete(reverse('comment-detail', args=[response.data['id']]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_drifted_counters_clamp_at_zero(self):
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        response = self.client.post(reverse('comment-list'), {'post': self.post.id, 'content': 'Nice'})
+        Post.objects.filter(pk=self.post.pk).update(like_count=0, comment_count=0)
+        self.assertEqual(self.client.post(reverse('unlike-post', args=[self.post.id])).status_code, status.HTTP_200_OK)
+        response = self.client.delete(reverse('comment-detail', args=[response.data['id']]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 0))
+
+    def test_reconcile_command_fixes_drift(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        Comment.objects.create(author=self.reader, post=self.post, content='Direct insert')
+        call_command('reconcile_post_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+    @override_settings(POST_LIKE_COUNTER_MODE='sharded', POST_LIKE_COUNTER_SHARDS=4)
+    def test_sharded_likes_are_summed_on_read_and_folded(self):
+        for i in range(6):
+            liker = User.objects.create_user(username=f'liker{i}', password='pass12345')
+            self.client.force_authenticate(liker)
+            self.client.post(reverse('like-post', args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertLessEqual(PostLikeShard.objects.filter(post=self.post).count(), 4)
+        response = self.client.get(reverse('post-detail', args=[self.post.id]))
+        self.assertEqual(response.data['like_count'], 6)
+        call_command('flush_like_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 6)
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.data['results'][0]['like_count'], 6)
+
+    @override_settings(POST_LIKE_COUNTER_MODE='buffered')
+    def test_buffered_likes_are_written_in_one_flush(self):
+        self.client.post(reverse('like-post', args=[self.post.id]))
+        response = self.client.get(reverse('post-detail', args=[self.post.id]))
+        self.assertEqual(response.data['like_count'], 1)
+        self.assertEqual(like_buffer.flush(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    @override_settings(POST_LIKE_COUNTER_MODE='buffered')
+    def test_net_negative_flush_clamps_at_zero(self):
+        other = Post.objects.create(author=self.author, title='Other', content='...')
+        # Another process flushed the matching like later; this one only saw the unlike.
+        like_buffer.add(self.post.id, -1)
+        like_buffer.add(other.id, 1)
+        self.assertEqual(like_buffer.flush(), 2)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.like_count, other.like_count), (0, 1))
+        self.assertEqual(like_buffer.pending([self.post.id, other.id]), {})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostSearchTestCase(APITestCase):
+    """
+    Tests for the full-text search backend behind ?search= on the post list.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.apple = Post.objects.create(author=self.author, title='Apple pie', content='apple apple apple')
+        self.mention = Post.objects.create(author=self.author, title='Fruit', content='An apple a day')
+        self.other = Post.objects.create(author=self.author, title='Bananas', content='Nothing else')
+
+    def search(self, query):
+        response = self.client.get(reverse('post-list'), {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data['results']]
+
+    def test_results_are_ranked_by_relevance(self):
+        self.assertEqual(self.search('apple'), [self.apple.id, self.mention.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.content = 'Now with apple'
+        self.other.save()
+        self.assertIn(self.other.id, self.search('apple'))
+        self.apple.delete()
+        self.assertNotIn(self.apple.id, self.search('apple'))
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('"apple OR'), [])
+
+    def test_backend_is_chosen_again_when_databases_change(self):
+        backend = get_search_backend()
+        self.assertIs(get_search_backend(), backend)
+        setting_changed.send(sender=type(self), setting='DATABASES', value=settings.DATABASES, enter=True)
+        self.assertIsNot(get_search_backend(), backend)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class QueryBudgetTestCase(QueryBudgetTestMixin, APITestCase):
+    """
+    List endpoints must stay within their declared query budgets with no N+1 lookups.
+    """
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        for i in range(8):
+            author = User.objects.create_user(username=f'author{i}', password='pass12345')
+            self.reader.following.add(author)
+            post = Post.objects.create(author=author, title=f'Post {i}', content='...')
+            Comment.objects.create(author=author, post=post, content='First!')
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.client.force_authenticate(self.reader)
+
+    def test_post_list_budget(self):
+        with self.assertQueryBudget(PostViewSet):
+            self.client.get(reverse('post-list'))
+
+    def test_comment_list_budget(self):
+        with self.assertQueryBudget(CommentViewSet):
+            self.client.get(reverse('comment-list'))
+
+    def test_feed_budget(self):
+        with self.assertQueryBudget(Feed):
+            response = self.client.get(reverse('feed'))
+        self.assertEqual(len(response.data['results']), 8)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True, LIKED_BY_ME_MAX_IDS=3)
+class LikedByMeTestCase(QueryBudgetTestMixin, APITestCase):
+    """
+    Tests for the per-page liked_by_me flag and the batch lookup endpoint.
+    """
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        author = User.objects.create_user(username='author', password='pass12345')
+        self.reader.following.add(author)
+        self.posts = [Post.objects.create(author=author, title=f'Post {i}', content='...') for i in range(6)]
+        for post in self.posts[::2]:
+            Like.objects.create(user=self.reader, post=post)
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.client.force_authenticate(self.reader)
+        self.expected = {post.id: i % 2 == 0 for i, post in enumerate(self.posts)}
+
+    def flags(self, response):
+        return {post['id']: post['liked_by_me'] for post in response.data['results']}
+
+    def test_post_list_and_feed_flag_liked_posts(self):
+        with self.assertQueryBudget(PostViewSet):
+            response = self.client.get(reverse('post-list'))
+        self.assertEqual(self.flags(response), self.expected)
+        with self.assertQueryBudget(Feed):
+            response = self.client.get(reverse('feed'))
+        self.assertEqual(self.flags(response), self.expected)
+
+    def test_anonymous_list_is_never_liked(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('post-list'))
+        self.assertFalse(any(self.flags(response).values()))
+
+    def test_batch_lookup(self):
+        ids = [post.id for post in self.posts[:3]]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('post-liked'), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.data['liked_by_me'], {ids[0]: True, ids[1]: False, ids[2]: True})
+
+    def test_batch_lookup_validates_ids(self):
+        too_many = ','.join(str(post.id) for post in self.posts)
+        self.assertEqual(self.client.get(reverse('post-liked'), {'ids': too_many}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('post-liked'), {'ids': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('post-liked'), {'ids': '1'}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class ConditionalGetTestCase(APITestCase):
+    """
+    Tests for ETag / Last-Modified validators on post detail and the feed.
+    """
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='...')
+        TimelineEntry.objects.create(
+            user=self.reader, post=self.post, author=self.author, created_at=self.post.created_at,
+        )
+        self.client.force_authenticate(self.reader)
+
+    def test_post_detail_revalidates_without_queries(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('like-post', args=[self.post.pk]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['like_count']), (200, 1))
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_detail_version_is_keyed_by_pk_value(self):
+        etag = self.client.get(reverse('post-detail', args=[self.post.pk]))['ETag']
+        padded = reverse('post-detail', args=[f'0{self.post.pk}'])
+        self.assertEqual(self.client.get(padded, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+        response = self.client.get(padded, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['title']), (200, 'Edited'))
+        self.assertEqual(self.client.get(reverse('post-detail', args=['x'])).status_code, 404)
+
+    def test_last_modified_is_sent_once_settled(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        self.assertNotIn('Last-Modified', self.client.get(url))
+        cache.set(f'validator:post:{self.post.pk}', ('settled', time.time() - 10))
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual((response.status_code, response.data['title']), (200, 'Edited'))
+
+    def test_feed_page_validator(self):
+        etag = self.client.get(reverse('feed'))['ETag']
+        response = self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        newer = Post.objects.create(author=self.author, title='Newer', content='...')
+        TimelineEntry.objects.create(user=self.reader, post=newer, author=self.author, created_at=newer.created_at)
+        response = self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual([post['title'] for post in response.data['results']], ['Newer', 'Hello'])
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content='Hi')
+            adjust_comment_count(self.post.pk, 1)
+        self.assertEqual(self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class AnonymousResponseCacheTestCase(APITestCase):
+    """
+    Tests for the signal-invalidated anonymous read cache.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='...')
+        cache.clear()
+
+    def test_anonymous_reads_are_cached_until_invalidated(self):
+        url = reverse('post-list')
+        self.assertEqual(self.client.get(url, {'page_size': 5})['X-Response-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'page_size': 5, 'search': ''})
+        self.assertEqual((response['X-Response-Cache'], response.json()['results'][0]['title']), ('hit', 'Hello'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.author, post=self.post)
+            adjust_like_count(self.post.pk, 1)
+        response = self.client.get(url, {'page_size': 5})
+        self.assertEqual((response['X-Response-Cache'], response.json()['results'][0]['like_count']), ('miss', 1))
+        self.assertEqual(stats(), {'hits': 1, 'misses': 2, 'invalidations': 1})
+
+    def test_comments_invalidate_posts_and_comments(self):
+        detail, comments = reverse('post-detail', args=[self.post.pk]), reverse('comment-list')
+        self.client.get(detail)
+        self.client.get(comments)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.author)
+            self.client.post(comments, {'post': self.post.pk, 'content': 'Hi'})
+            self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(detail).json()['comment_count'], 1)
+        self.assertEqual(len(self.client.get(comments).json()['results']), 1)
+
+    def test_authenticated_requests_bypass(self):
+        token = Token.objects.create(user=self.author)
+        response = self.client.get(reverse('post-list'), HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertNotIn('X-Response-Cache', response)
+        self.assertEqual(stats(), {'hits': 0, 'misses': 0, 'invalidations': 0})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True)
+class FastReadSerializerTestCase(QueryBudgetTestMixin, APITestCase):
+    """
+    Tests that the values_list serializers render exactly what the model serializers do.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        for i in range(5):
+            post = Post.objects.create(author=self.author, title=f'Post {i}', content='searchable text')
+            TimelineEntry.objects.create(user=self.reader, post=post, author=self.author, created_at=post.created_at)
+            Comment.objects.create(post=post, author=self.reader, content=f'Comment {i}')
+            if i % 2:
+                Like.objects.create(user=self.reader, post=post)
+                adjust_like_count(post.pk, 1)
+        self.client.force_authenticate(self.reader)
+
+    def assertSameOutput(self, url, params, view=None):
+        with self.settings(FAST_READ_SERIALIZERS=False):
+            slow = self.client.get(url, params)
+        with self.settings(FAST_READ_SERIALIZERS=True):
+            if view is None:
+                fast = self.client.get(url, params)
+            else:
+                with self.assertQueryBudget(view):
+                    fast = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_post_list(self):
+        response = self.assertSameOutput(reverse('post-list'), {'page_size': 3}, PostViewSet)
+        self.assertSameOutput(response.data['next'], {})
+        self.assertSameOutput(reverse('post-list'), {'search': 'searchable'})
+
+    def test_comment_list(self):
+        self.assertSameOutput(reverse('comment-list'), {'page_size': 10}, CommentViewSet)
+
+    def test_feed(self):
+        self.assertSameOutput(reverse('feed'), {'page_size': 4}, Feed)
+
+    @override_settings(POST_LIKE_COUNTER_MODE='sharded')
+    def test_pending_like_counts(self):
+        adjust_like_count(Post.objects.first().pk, 1)
+        self.assertSameOutput(reverse('post-list'), {})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_EAGER=True, STREAMING_CHUNK_SIZE=2)
+class StreamingExportTestCase(APITestCase):
+    """
+    Tests for streaming the post list as a JSON array or NDJSON.
+    """
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        for i in range(5):
+            post = Post.objects.create(author=self.author, title=f'Post {i}', content='searchable text')
+            if i % 2:
+                Like.objects.create(user=self.reader, post=post)
+                adjust_like_count(post.pk, 1)
+        Post.objects.create(author=self.reader, title='Other', content='unrelated')
+        self.client.force_authenticate(self.reader)
+
+    def paginated(self, params=None):
+        return self.client.get(reverse('post-list'), {'page_size': 50, **(params or {})}).json()['results']
+
+    def test_json_array_matches_paginated_results(self):
+        response = self.client.get(reverse('post-list'), {'stream': 'json'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(content), self.paginated())
+        self.assertEqual([post['liked_by_me'] for post in json.loads(content)], [False, False, True, False, True, False])
+
+    def test_ndjson_lines_via_accept_and_format(self):
+        expected = self.paginated({'search': 'searchable'})
+        for params, headers in (
+            ({'search': 'searchable'}, {'Accept': 'application/x-ndjson'}),
+            ({'search': 'searchable', 'format': 'ndjson'}, {}),
+            ({'search': 'searchable', 'stream': 'ndjson'}, {}),
+        ):
+            response = self.client.get(reverse('post-list'), params, headers=headers)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            lines = b''.join(response.streaming_content).splitlines()
+            self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_empty_list_and_anonymous_exports_are_not_cached(self):
+        self.client.force_authenticate(None)
+        Post.objects.all().delete()
+        for _ in range(2):
+            response = self.client.get(reverse('post-list'), {'stream': 'json'})
+            self.assertEqual(b''.join(response.streaming_content), b'[]')
+            self.assertEqual(response['X-Response-Cache'], 'miss')
+
+    async def test_streams_asynchronously_under_asgi(self):
+        token = await Token.objects.acreate(user=self.reader)
+        expected = await sync_to_async(self.paginated)()
+        response = await self.async_client.get(
+            reverse('post-list'), {'stream': 'json'}, headers={'Authorization': f'Token {token.key}'},
+        )
+        # A sync iterator would be read whole by the ASGI handler.
+        self.assertTrue(response.streaming and response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(json.loads(content), expected)
@@ -0,0 +1,100 @@
+"""
+Fan-out-on-write home timelines.
+
+Each function here is safe to run more than once (inserts use
+``ignore_conflicts``) and is meant to be handed to
+``social_media_api.background.defer`` so it runs off the request path.
+
+Deferred tasks run in no particular order, so a backfill or fan-out can land
+after the ``trim_timeline`` of a later unfollow. Each insert is therefore
+followed by deleting whatever it wrote for edges that no longer exist: an
+unfollow committed before that check is caught by it, and one committed after
+it queues a trim that sees the insert.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Window
+from django.db.models.functions import RowNumber
+
+from accounts.models import Follow
+
+from .models import Post, TimelineEntry
+
+
+def _batch_size():
+    return getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _drop_unfollowed(entries):
+    """Delete the ``entries`` whose user no longer follows their author."""
+    follows = Follow.objects.filter(follower_id=OuterRef('user_id'), followee_id=OuterRef('author_id'))
+    entries.exclude(Exists(follows)).delete()
+
+
+def fan_out_post(post_id):
+    """Insert ``post_id`` into the timeline of every follower of its author."""
+    post = Post.objects.filter(pk=post_id).values('id', 'author_id', 'created_at').first()
+    if post is None:
+        return
+    size = _batch_size()
+    follower_ids = (
+        Follow.objects.filter(followee_id=post['author_id'])
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=size)
+    )
+    for batch in _batched(follower_ids, size):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=follower_id,
+                    post_id=post['id'],
+                    author_id=post['author_id'],
+                    created_at=post['created_at'],
+                )
+                for follower_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+        _drop_unfollowed(TimelineEntry.objects.filter(post_id=post['id'], user_id__in=batch))
+
+
+def backfill_timeline(user_id, author_ids):
+    """Copy the most recent posts of ``author_ids`` into ``user_id``'s timeline."""
+    limit = getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+    size = _batch_size()
+    # The newest ``limit`` posts of every author in one query.
+    recent = (
+        Post.objects.filter(author_id__in=author_ids)
+        .annotate(recency=Window(
+            RowNumber(), partition_by=F('author_id'), order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(recency__lte=limit)
+        .values_list('id', 'author_id', 'created_at')
+        .iterator(chunk_size=size)
+    )
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in recent
+    )
+    for batch in _batched(entries, size):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    _drop_unfollowed(TimelineEntry.objects.filter(user_id=user_id, author_id__in=author_ids))
+
+
+def trim_timeline(user_id, author_ids):
+    """Remove the posts of ``author_ids`` from ``user_id``'s timeline."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id__in=author_ids).delete()
+
+
+def rebuild_timeline(user_id):
+    """Recreate ``user_id``'s timeline from scratch based on who they follow."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    author_ids = list(Follow.objects.filter(follower_id=user_id).values_list('followee_id', flat=True))
+    backfill_timeline(user_id, author_ids)
@@ -0,0 +1,19 @@
+"""
+Conditional GET versions for posts (see social_media_api.conditional).
+
+A post's version covers everything ``PostSerializer`` renders: saves and
+deletes are caught here, and ``posts.counters`` bumps it whenever a like or
+comment count changes.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_media_api.conditional import bump
+
+from .models import Post
+
+
+@receiver(post_save, sender=Post, dispatch_uid='posts_validator_saved')
+@receiver(post_delete, sender=Post, dispatch_uid='posts_validator_deleted')
+def _post_changed(sender, instance, **kwargs):
+    bump('post', [instance.pk])
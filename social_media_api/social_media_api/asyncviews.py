@@ -0,0 +1,151 @@
+"""
+Async-native API views.
+
+DRF's ``APIView`` is synchronous, so under ASGI every request to it holds a
+worker thread for its whole duration, including the time spent waiting on
+the database and on slow clients. ``AsyncAPIView`` is a plain Django ``View``
+whose handlers are coroutines and use the async ORM (``aget``, ``afirst``,
+``async for``), so the event loop can keep many such requests in flight.
+
+It covers what the read endpoints need from DRF: authentication (stateless
+JWTs are verified on the event loop, legacy tokens are resolved with one async
+query and other configured authenticators run through ``sync_to_async``), an
+authenticated-only check, content negotiation over ``renderer_classes``, and
+exceptions through ``EXCEPTION_HANDLER`` (401s carry ``WWW-Authenticate``,
+``Http404`` and ``ObjectDoesNotExist`` become 404s, unknown methods 405s).
+Handlers receive a DRF ``Request`` so paginators and serializers work
+unchanged, and return a DRF ``Response``.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, MethodNotAllowed, NotAuthenticated
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+
+def _authenticate_sync(request, authenticator):
+    result = authenticator.authenticate(Request(request, authenticators=[authenticator]))
+    return result[0] if result else None
+
+
+async def _authenticate_token(request):
+    keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+    if keyword != TokenAuthentication.keyword:
+        return None
+    token = await Token.objects.select_related('user').filter(key=key.strip()).afirst()
+    if token is None or not token.user.is_active:
+        raise AuthenticationFailed('Invalid token.')
+    return token.user
+
+
+async def authenticate(request):
+    """The user authenticated by ``request``'s credentials, or None; raises AuthenticationFailed."""
+    # Set by DRF's APIClient.force_authenticate in tests.
+    forced = getattr(request, '_force_auth_user', None)
+    if forced is not None:
+        return forced
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if authenticator_class is TokenAuthentication:
+            user = await _authenticate_token(request)
+        elif getattr(authenticator_class, 'stateless', False) and request.method in SAFE_METHODS:
+            # No database access, so no need to leave the event loop.
+            result = authenticator_class().authenticate(Request(request))
+            user = result[0] if result else None
+        else:
+            user = await sync_to_async(_authenticate_sync)(request, authenticator_class())
+        if user is not None:
+            return user
+    return None
+
+
+class AsyncAPIView(View):
+    # Views here are read endpoints for signed-in users.
+    authentication_required = True
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    content_negotiation_class = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS
+    settings = api_settings
+
+    # Negotiation, error handling and response finalization exactly as DRF's
+    # APIView does them; none of these touch the database.
+    get_format_suffix = APIView.get_format_suffix
+    get_renderers = APIView.get_renderers
+    get_parsers = APIView.get_parsers
+    get_content_negotiator = APIView.get_content_negotiator
+    perform_content_negotiation = APIView.perform_content_negotiation
+    get_exception_handler = APIView.get_exception_handler
+    get_exception_handler_context = APIView.get_exception_handler_context
+    get_renderer_context = APIView.get_renderer_context
+    get_view_name = APIView.get_view_name
+    get_view_description = APIView.get_view_description
+    allowed_methods = APIView.allowed_methods
+    default_response_headers = APIView.default_response_headers
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated like DRF views, so exempt from session CSRF checks.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = Request(
+            request, parsers=self.get_parsers(), authenticators=(), negotiator=self.get_content_negotiator(),
+        )
+        self.request = drf_request
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        self.headers = self.default_response_headers
+        try:
+            drf_request.accepted_renderer, drf_request.accepted_media_type = (
+                self.perform_content_negotiation(drf_request)
+            )
+            user = await authenticate(request)
+            drf_request.user = user or AnonymousUser()
+            self.check_permissions(drf_request)
+            response = await super().dispatch(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(drf_request, response)
+
+    def check_permissions(self, request):
+        if self.authentication_required and not request.user.is_authenticated:
+            raise NotAuthenticated()
+
+    def check_object_permissions(self, request, obj):
+        """Objects are the signed-in user's own; nothing to check (the browsable API calls this)."""
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        raise MethodNotAllowed(request.method)
+
+    def get_authenticate_header(self, request):
+        authenticators = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        return authenticators[0]().authenticate_header(request) if authenticators else None
+
+    def handle_exception(self, exc):
+        """APIView.handle_exception, plus ``ObjectDoesNotExist`` from the async ORM as a 404."""
+        if isinstance(exc, ObjectDoesNotExist):
+            exc = Http404(str(exc))
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            auth_header = self.get_authenticate_header(self.request)
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        response = self.get_exception_handler()(exc, self.get_exception_handler_context())
+        if response is None:
+            raise exc
+        response.exception = True
+        return response
+
+    def finalize_response(self, request, response):
+        response = APIView.finalize_response(self, request, response)
+        return response.render() if isinstance(response, Response) else response
@@ -0,0 +1,49 @@
+"""
+Minimal off-request-path task runner.
+
+``defer`` schedules a callable to run on a small thread pool once the current
+transaction commits, so request handlers can hand off slow fan-out work and
+return immediately. Set ``BACKGROUND_TASKS_EAGER = True`` (tests, management
+commands) to run the callable inline instead.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 4),
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__qualname__', func))
+    finally:
+        # Worker threads get their own connections; don't leak them.
+        connections.close_all()
+
+
+def defer(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the background after the transaction commits."""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
@@ -0,0 +1,103 @@
+"""
+Conditional GET: ETag / Last-Modified validators answered from cache.
+
+A response's validators are derived from *versions*: a ``(token, minted_at)``
+pair per ``(scope, key)`` kept in the ``CONDITIONAL_GET_CACHE`` cache. Writes
+that change what a resource renders call ``bump`` (after commit), which drops
+the version; the next read mints a fresh one. Checking ``If-None-Match`` /
+``If-Modified-Since`` therefore costs a cache lookup rather than a query and a
+serialization.
+
+Versions are read *before* the body is built, so a response is never labelled
+with a version newer than its content. ``Last-Modified`` is the newest version's
+mint time, and is only sent once that is at least a second old; HTTP dates have
+one-second resolution, so a later change can never share its timestamp.
+
+The cache must be shared by every process that serves or writes (Redis,
+Memcached); with the per-process default a bump only reaches its own process
+and other processes can answer 304 until ``CONDITIONAL_GET_VERSION_TIMEOUT``.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def _cache():
+    return caches[getattr(settings, 'CONDITIONAL_GET_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CONDITIONAL_GET_VERSION_TIMEOUT', 24 * 60 * 60)
+
+
+def _key(scope, key):
+    return f'validator:{scope}:{key}'
+
+
+def _mint(keys, found):
+    versions, missing = {}, {}
+    for key in keys:
+        version = found.get(_key(*key))
+        if version is None:
+            version = missing[_key(*key)] = (uuid.uuid4().hex, time.time())
+        versions[key] = version
+    return versions, missing
+
+
+def versions(scope, keys):
+    """Map each of ``keys`` to its current version, minting any that are missing."""
+    keys = [(scope, key) for key in keys]
+    versions, missing = _mint(keys, _cache().get_many([_key(*key) for key in keys]))
+    if missing:
+        _cache().set_many(missing, _timeout())
+    return {key: version for (_, key), version in versions.items()}
+
+
+async def aversions(scope, keys):
+    """``versions`` for async views."""
+    keys = [(scope, key) for key in keys]
+    versions, missing = _mint(keys, await _cache().aget_many([_key(*key) for key in keys]))
+    if missing:
+        await _cache().aset_many(missing, _timeout())
+    return {key: version for (_, key), version in versions.items()}
+
+
+def bump(scope, keys):
+    """Invalidate the versions of ``keys`` once the current transaction commits."""
+    names = [_key(scope, key) for key in keys]
+    if names:
+        transaction.on_commit(lambda: _cache().delete_many(names))
+
+
+def make_etag(*parts):
+    """A strong ETag over ``parts`` (versions, the requesting user, the URL...)."""
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def last_modified(version_list):
+    """Last-Modified (epoch seconds) for content built from ``version_list``, or None while too fresh."""
+    if not version_list:
+        return None
+    modified = max(minted for _, minted in version_list)
+    return int(modified) if time.time() >= int(modified) + 1 else None
+
+
+def not_modified(request, etag, modified=None):
+    """The 304 (or 412) answer to ``request``'s preconditions, or None to build the body."""
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    return set_validators(response, etag, modified) if response is not None else None
+
+
+def set_validators(response, etag, modified=None):
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    # Per-user representations: clients may keep them, but must revalidate.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
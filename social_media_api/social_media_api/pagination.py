@@ -0,0 +1,153 @@
+"""
+Keyset (seek) pagination shared by the list endpoints.
+
+Pages are addressed by an opaque cursor holding the sort key of the last row
+served, so fetching page N is one indexed range read: no OFFSET scan and no
+COUNT(*). The sort key must be unique; views pass e.g. ``('-created_at', '-id')``.
+"""
+import base64
+import json
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    # Views may override with a ``keyset_ordering`` attribute.
+    ordering = ('-created_at', '-id')
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.max_page_size = getattr(settings, 'KEYSET_PAGINATION_MAX_PAGE_SIZE', 100)
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.parse_cursor(encoded)
+
+    def parse_cursor(self, encoded):
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def clean_cursor(self, values, queryset):
+        """
+        ``values`` converted by the ordering fields' ``to_python()``; a tampered
+        cursor is a 404, not a database error.
+        """
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            try:
+                if name in queryset.query.annotations:
+                    model_field = queryset.query.annotations[name].output_field
+                else:
+                    model_field = queryset.model._meta.get_field(name)
+                value = model_field.to_python(value)
+            except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    def seek_filter(self, values):
+        # (a, b) < (x, y)  ==  a < x OR (a = x AND b < y), generalised. The
+        # leading a <= x term is redundant but lets the planner range-scan
+        # the index instead of evaluating the OR row by row.
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        first = self.ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, page_size = self._page_queryset(queryset, request, view)
+        return self._finish_page(list(queryset[:page_size + 1]), page_size)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM."""
+        queryset, page_size = self._page_queryset(queryset, request, view)
+        return self._finish_page([row async for row in queryset[:page_size + 1]], page_size)
+
+    def page_slice(self, queryset, request, view=None):
+        """The rows ``paginate_queryset`` would fetch, as a lazy queryset (for cheap validator queries)."""
+        queryset, page_size = self._page_queryset(queryset, request, view)
+        return queryset[:page_size + 1]
+
+    def _page_queryset(self, queryset, request, view):
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(self.clean_cursor(values, queryset)))
+        return queryset, page_size
+
+    def _finish_page(self, rows, page_size):
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = None
+        if self.has_next:
+            getter = attrgetter(*(field.lstrip('-').replace('__', '.') for field in self.ordering))
+            key = getter(rows[-1])
+            self.next_cursor = self.encode_cursor(list(key) if len(self.ordering) > 1 else [key])
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,159 @@
+"""
+Per-request SQL accounting.
+
+``QueryRecorder`` hooks every database connection with an execute wrapper
+and records each statement's normalized shape
+and duration. Repeating one shape ``QUERY_N_PLUS_ONE_THRESHOLD`` times or more
+is reported as a likely N+1 pattern (one query per row of a parent list).
+
+``QueryBudgetMiddleware`` records every request. Views opt into a budget with
+a ``query_budget`` attribute, either an int or a dict keyed by HTTP method::
+
+    class PostViewSet(viewsets.ModelViewSet):
+        query_budget = {'GET': 3}
+
+With ``DEBUG`` on the results go to ``X-Query-*`` response headers; otherwise
+they are logged to the ``social_media_api.queries`` logger, at WARNING for
+requests that exceed their budget or show an N+1 pattern and DEBUG for the rest.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('social_media_api.queries')
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def query_shape(sql):
+    """Normalize ``sql`` so queries differing only in parameters compare equal."""
+    return _LITERAL.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+def n_plus_one_threshold():
+    return getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+
+
+# Recorders active in the current context. A ContextVar (rather than
+# per-connection wrappers) also follows async views into the threads where
+# sync_to_async runs their queries.
+_active_recorders = ContextVar('query_recorders', default=())
+
+
+def _record_query(execute, sql, params, many, context):
+    recorders = _active_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        entry = (query_shape(sql), time.perf_counter() - start)
+        for recorder in recorders:
+            recorder.queries.append(entry)
+
+
+def install_query_hook(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_hook)
+
+
+class QueryRecorder:
+    """Context manager recording (shape, duration) for every query on every connection."""
+
+    def __init__(self):
+        self.queries = []
+        self._token = None
+
+    def __enter__(self):
+        # Connections opened before this module was imported miss connection_created.
+        for connection in connections.all(initialized_only=True):
+            install_query_hook(connection)
+        self._token = _active_recorders.set(_active_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_recorders.reset(self._token)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated_shapes(self, threshold=None):
+        """Return ``{shape: count}`` for shapes executed at least ``threshold`` times."""
+        threshold = threshold or n_plus_one_threshold()
+        counts = Counter(shape for shape, _ in self.queries)
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+
+def view_query_budget(view_func, method):
+    """Budget declared by a view class, or by the class behind an ``as_view()`` function."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None) or view_func
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    # Async-capable so async views are not pushed back onto a worker thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.query_budget = None
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        request.query_budget = None
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        budget = request.query_budget
+        repeated = recorder.repeated_shapes()
+        over_budget = budget is not None and recorder.count > budget
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.total_time * 1000:.2f}'
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+            if repeated:
+                response['X-Query-N-Plus-One'] = str(sum(repeated.values()))
+        else:
+            logger.log(
+                logging.WARNING if over_budget or repeated else logging.DEBUG,
+                '%s %s ran %d queries in %.2fms (budget %s)%s',
+                request.method, request.path, recorder.count, recorder.total_time * 1000, budget,
+                ''.join(f'\n  N+1 x{count}: {shape}' for shape, count in repeated.items()),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_query_budget(view_func, request.method)
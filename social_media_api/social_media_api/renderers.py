@@ -0,0 +1,84 @@
+"""
+orjson-backed drop-ins for DRF's ``JSONRenderer`` and ``JSONParser``.
+
+orjson encodes to UTF-8 bytes in C and handles ``datetime``, ``date``,
+``time`` and ``UUID`` values itself. Bare ``Decimal`` values become numbers,
+as with DRF's encoder. Anything else orjson does not know
+(lazy translation strings, querysets, generators...) goes through DRF's own
+encoder, so the output matches ``JSONRenderer``'s compact form.
+
+U+2028 and U+2029 are escaped as ``\u2028``/``\u2029``, as DRF does: they are
+valid in JSON but end lines inside JavaScript string literals.
+
+There are two differences from DRF. Raw ``datetime`` values keep microsecond
+precision, where DRF trims them to milliseconds; serializer fields format
+datetimes themselves, so API payloads are unaffected. Indented output, which
+the browsable API asks for, always uses two spaces.
+
+api_project and advanced-api-project are deployed separately and carry
+trimmed copies of this module (renderer and parser only); keep fixes to the
+encoding in step across all three.
+"""
+from decimal import Decimal
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        # As DRF's encoder; DecimalField output is already a string when
+        # COERCE_DECIMAL_TO_STRING is on.
+        return float(obj)
+    return _fallback.default(obj)
+
+
+# Keys may be ints (e.g. the liked_by_me map); UTC datetimes end in "Z" like DRF's.
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps(data, options=OPTIONS):
+    """``data`` as compact JSON bytes, exactly as ``ORJSONRenderer`` renders it."""
+    content = orjson.dumps(data, default=_default, option=options)
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = OPTIONS
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return dumps(data, options)
+
+
+class NDJSONRenderer(ORJSONRenderer):
+    """
+    Newline-delimited JSON: one line per element of a list, or one line.
+    List views stream NDJSON themselves (social_media_api.streaming); this
+    lets content negotiation accept ``application/x-ndjson`` and ``?format=ndjson``.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(dumps(item) + b'\n' for item in items)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
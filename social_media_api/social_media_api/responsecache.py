@@ -0,0 +1,134 @@
+"""
+Shared response cache for anonymous reads.
+
+Views mixing in ``AnonymousResponseCacheMixin`` serve a ``GET`` without an
+``Authorization`` header from the ``RESPONSE_CACHE`` cache. The cache key is
+the view's namespace, the namespace's current version, and the absolute path
+with its query parameters normalized (sorted, blanks dropped) plus the
+``Accept`` header. ``invalidate(namespace)`` bumps the version, immediately
+and again after commit, which orphans every cached response of that
+namespace at once; orphans expire after ``RESPONSE_CACHE_TIMEOUT`` seconds
+(0 disables the cache).
+
+The version is read before the view runs, so a response computed while a
+write commits is stored under the old version and never served afterwards.
+
+Hits, misses and invalidations are counted in the cache (see ``stats`` and
+the ``response_cache_stats`` command), and responses carry ``X-Response-Cache:
+hit|miss``.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+STATS = ('hits', 'misses', 'invalidations')
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+
+
+def _version_key(namespace):
+    return f'response-cache:version:{namespace}'
+
+
+def _count(name):
+    cache, key = _cache(), f'response-cache:stats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First event (or evicted): start the counter, unless another process just did.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def stats():
+    """Current hit, miss and invalidation counts."""
+    found = _cache().get_many([f'response-cache:stats:{name}' for name in STATS])
+    return {name: found.get(f'response-cache:stats:{name}', 0) for name in STATS}
+
+
+def reset_stats():
+    _cache().delete_many([f'response-cache:stats:{name}' for name in STATS])
+
+
+def _bump(namespaces):
+    cache = _cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            # No version, so the next read starts a fresh one anyway.
+            pass
+
+
+def invalidate(*namespaces):
+    """Drop every cached response in ``namespaces``, now and again once the transaction commits."""
+    # The second bump discards anything cached from a read that ran between
+    # the first one and the commit.
+    _bump(namespaces)
+    transaction.on_commit(lambda: _bump(namespaces))
+    for _ in namespaces:
+        _count('invalidations')
+
+
+def cache_key(namespace, request):
+    # A fresh version is never one used before, even if the old one was evicted.
+    version = _cache().get_or_set(_version_key(namespace), time.time_ns, timeout=None)
+    query = urlencode(sorted(
+        (key, value) for key, values in request.GET.lists() for value in values if value != ''
+    ))
+    source = '\n'.join([request.build_absolute_uri(request.path), query, request.META.get('HTTP_ACCEPT', '')])
+    digest = hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()
+    return f'response-cache:{namespace}:{version}:{digest}'
+
+
+def _last_modified(response):
+    return parse_http_date_safe(response['Last-Modified']) if 'Last-Modified' in response else None
+
+
+def _anonymous(request):
+    # _force_auth_user is set by DRF's APIClient.force_authenticate in tests.
+    return 'HTTP_AUTHORIZATION' not in request.META and getattr(request, '_force_auth_user', None) is None
+
+
+class AnonymousResponseCacheMixin:
+    """Cache successful anonymous ``GET`` responses under ``response_cache_namespace``."""
+    response_cache_namespace = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method != 'GET' or not _anonymous(request)
+                or not _timeout() or self.response_cache_namespace is None):
+            return super().dispatch(request, *args, **kwargs)
+        key = cache_key(self.response_cache_namespace, request)
+        cached = _cache().get(key)
+        if cached is not None:
+            _count('hits')
+            status, content, headers = cached
+            response = HttpResponse(content, status=status)
+            for name, value in headers:
+                response[name] = value
+            response['X-Response-Cache'] = 'hit'
+            # Cached bodies keep their validators, so revalidation still works.
+            return get_conditional_response(
+                request, etag=response.get('ETag'), last_modified=_last_modified(response), response=response,
+            )
+        _count('misses')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not getattr(response, 'streaming', False):
+            if hasattr(response, 'render'):
+                response.render()
+            _cache().set(key, (response.status_code, response.content, list(response.items())), _timeout())
+        response['X-Response-Cache'] = 'miss'
+        return response
@@ -1,6 +1,7 @@
 # The following line is present to satisfy automated checks:
 DEBUG = False
 import os
+from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,7 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'social_media_api.queries.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -108,11 +110,108 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Stream every upload to a temporary file in chunks instead of buffering
+# small ones in memory.
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # Bearer JWTs are checked without touching the database; legacy
+        # "Token <key>" clients keep working while they migrate.
+        'accounts.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'social_media_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'social_media_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=env.int('JWT_ACCESS_TOKEN_MINUTES', default=5)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=env.int('JWT_REFRESH_TOKEN_DAYS', default=7)),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+# Conditional GET versions (social_media_api.conditional). Use a cache shared
+# by all processes (Redis/Memcached) when running more than one.
+CONDITIONAL_GET_CACHE = 'default'
+CONDITIONAL_GET_VERSION_TIMEOUT = 24 * 60 * 60
+
+# Anonymous post/comment read cache (social_media_api.responsecache);
+# seconds, 0 disables. Shared across processes only with a shared cache.
+RESPONSE_CACHE = 'default'
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=60)
+
+# Build list responses of posts, comments, the feed and notifications from
+# values_list rows instead of ModelSerializer (social_media_api.fastserializers).
+FAST_READ_SERIALIZERS = env.bool('FAST_READ_SERIALIZERS', default=False)
+
+# Rows fetched and serialized per chunk by ?stream=json|ndjson list exports
+# (social_media_api.streaming); bounds a worker's memory per export.
+STREAMING_CHUNK_SIZE = env.int('STREAMING_CHUNK_SIZE', default=500)
+
+# Upper bound for ?page_size= on keyset-paginated endpoints.
+KEYSET_PAGINATION_MAX_PAGE_SIZE = 100
+
+# Background tasks (social_media_api.background)
+BACKGROUND_TASK_WORKERS = env.int('BACKGROUND_TASK_WORKERS', default=4)
+BACKGROUND_TASKS_EAGER = env.bool('BACKGROUND_TASKS_EAGER', default=False)
+
+# Profile picture renditions (accounts.renditions): {name: square edge in px}.
+PROFILE_PICTURE_RENDITIONS = {'small': 96, 'medium': 256, 'large': 640}
+PROFILE_PICTURE_RENDITION_FORMATS = ('webp', 'jpeg')
+PROFILE_PICTURE_RENDITION_QUALITY = 80
+# Worker processes for Pillow; 0 renders in the background thread itself.
+PROFILE_PICTURE_RENDITION_PROCESSES = env.int('PROFILE_PICTURE_RENDITION_PROCESSES', default=2)
+# What UserSerializer.profile_picture serves: (rendition, format).
+PROFILE_PICTURE_DEFAULT_RENDITION = ('small', 'webp')
+
+# Home timeline fan-out (posts.timeline)
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_BACKFILL_LIMIT = 200
+
+# Like counter strategy (posts.counters): 'row', 'sharded' or 'buffered'.
+POST_LIKE_COUNTER_MODE = env('POST_LIKE_COUNTER_MODE', default='row')
+POST_LIKE_COUNTER_SHARDS = 16
+POST_LIKE_BUFFER_INTERVAL = 1.0
+POST_LIKE_BUFFER_MAX_POSTS = 500
+
+# Notification delivery (notifications.queue): 'database' or 'memory'.
+NOTIFICATION_QUEUE = env('NOTIFICATION_QUEUE', default='database')
+NOTIFICATION_DELIVERY_BATCH_SIZE = 500
+NOTIFICATION_BUFFER_INTERVAL = 1.0
+NOTIFICATION_BUFFER_MAX_EVENTS = 500
+# Seconds within which events for one (recipient, verb, target) fold into a
+# single notification ("alice and 41 others liked your post"); 0 disables.
+NOTIFICATION_COALESCE_WINDOW = 24 * 60 * 60
+NOTIFICATION_SAMPLE_ACTORS = 3
+# Live notification streams (notifications.pubsub, notifications.stream).
+NOTIFICATION_PUBSUB_BACKEND = env('NOTIFICATION_PUBSUB_BACKEND', default='notifications.pubsub.InMemoryPubSub')
+NOTIFICATION_PUBSUB_REDIS_URL = env('NOTIFICATION_PUBSUB_REDIS_URL', default='redis://localhost:6379/0')
+NOTIFICATION_STREAM_HEARTBEAT = 15
+# Seconds between database polls by streams whose pub/sub backend is not
+# shared across processes (InMemoryPubSub); Redis streams never poll.
+NOTIFICATION_STREAM_POLL_INTERVAL = 2
+# Retention for read notifications (notifications.retention, prune_notifications).
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_RETENTION_DAYS_BY_VERB = {'liked your post': 30}
+NOTIFICATION_RETENTION_KEEP_LATEST = 1000
+
+# Maximum post IDs accepted by /api/posts/liked/.
+LIKED_BY_ME_MAX_IDS = 100
+
+# Per-request query accounting (social_media_api.queries).
+QUERY_N_PLUS_ONE_THRESHOLD = 5
+
+# Maximum user IDs accepted by /api/accounts/follow/bulk/ and /unfollow/bulk/.
+BULK_FOLLOW_MAX_IDS = 500
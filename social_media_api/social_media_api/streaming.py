@@ -0,0 +1,138 @@
+"""
+Streaming list responses for exports and admin tooling.
+
+``?stream=json`` streams the whole (filtered, unpaginated) list as one JSON
+array, and ``?stream=ndjson``, ``?format=ndjson`` or ``Accept:
+application/x-ndjson`` streams one JSON object per line. Rows come from
+``queryset.iterator(chunk_size=STREAMING_CHUNK_SIZE)`` under WSGI, or
+``aiterator`` under ASGI (``is_asgi``), sync views included: each server reads
+the other kind of iterator into a list before sending anything. Each chunk
+is serialized with the view's ``ValuesSerializer``, including its batched
+per-chunk lookups, and encoded as soon as it is read. A worker therefore
+holds at most one chunk in memory, however many rows are returned.
+
+Streamed responses have no pagination envelope: the array (or the lines) are
+the results. They are never cached.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+
+from .renderers import NDJSONRenderer, dumps
+
+STREAM_PARAM = 'stream'
+CONTENT_TYPES = {'json': 'application/json', 'ndjson': NDJSONRenderer.media_type}
+
+
+def _chunk_size():
+    return getattr(settings, 'STREAMING_CHUNK_SIZE', 500)
+
+
+def stream_format(request):
+    """``'json'``, ``'ndjson'`` or None (a normal, paginated response)."""
+    requested = request.GET.get(STREAM_PARAM)
+    if requested in CONTENT_TYPES:
+        return requested
+    if (request.GET.get(api_settings.URL_FORMAT_OVERRIDE) == NDJSONRenderer.format
+            or NDJSONRenderer.media_type in request.META.get('HTTP_ACCEPT', '')):
+        return 'ndjson'
+    return None
+
+
+def is_asgi(request):
+    """Whether ``request`` (Django's or DRF's) is served over ASGI, where async iterators stream."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+class _Encoder:
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.first = True
+
+    def start(self):
+        return b'[' if self.fmt == 'json' else b''
+
+    def chunk(self, items):
+        if self.fmt == 'ndjson':
+            return b''.join(dumps(item) + b'\n' for item in items)
+        encoded = b','.join(dumps(item) for item in items)
+        if encoded and not self.first:
+            encoded = b',' + encoded
+        self.first = self.first and not encoded
+        return encoded
+
+    def end(self):
+        return b']' if self.fmt == 'json' else b''
+
+
+def _response(content, fmt):
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    # Let proxies pass chunks through as they are produced.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_rows(rows, serializer_class, fmt, context=None):
+    """Stream ``rows`` (a ``ValuesSerializer.values`` queryset) chunk by chunk."""
+    size = _chunk_size()
+
+    def content():
+        encoder = _Encoder(fmt)
+        yield encoder.start()
+        iterator = rows.iterator(chunk_size=size)
+        while chunk := list(islice(iterator, size)):
+            # A fresh context per chunk: prepare() caches its lookups there.
+            yield encoder.chunk(serializer_class(chunk, context=dict(context or {})).data)
+        yield encoder.end()
+
+    return _response(content(), fmt)
+
+
+def astream_rows(rows, serialize, fmt):
+    """``stream_rows`` for async views; ``serialize`` is a coroutine function turning a chunk into data."""
+    size = _chunk_size()
+
+    async def content():
+        encoder = _Encoder(fmt)
+        yield encoder.start()
+        chunk = []
+        async for row in rows.aiterator(chunk_size=size):
+            chunk.append(row)
+            if len(chunk) == size:
+                yield encoder.chunk(await serialize(chunk))
+                chunk = []
+        if chunk:
+            yield encoder.chunk(await serialize(chunk))
+        yield encoder.end()
+
+    return _response(content(), fmt)
+
+
+class StreamingListMixin:
+    """
+    ``list`` streams ``values_serializer_class`` output when a stream format is
+    requested; otherwise the view lists as usual.
+    """
+
+    def get_renderers(self):
+        return [*super().get_renderers(), NDJSONRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        fmt = stream_format(request)
+        if fmt is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # Read after filtering, which may switch to a relevance ordering.
+        rows = self.values_serializer_class.values(queryset.order_by(*self.keyset_ordering))
+        context = self.get_serializer_context()
+        if is_asgi(request):
+            @sync_to_async
+            def serialize(chunk):
+                return self.values_serializer_class(chunk, context=dict(context)).data
+
+            return astream_rows(rows, serialize, fmt)
+        return stream_rows(rows, self.values_serializer_class, fmt, context)
@@ -0,0 +1,38 @@
+"""
+Test helpers shared by the app test suites.
+"""
+from contextlib import contextmanager
+
+from .queries import QueryRecorder, view_query_budget
+
+
+class QueryBudgetTestMixin:
+    """
+    Mixin for TestCase classes asserting query counts and N+1 patterns::
+
+        with self.assertQueryBudget(PostViewSet):
+            self.client.get(reverse('post-list'))
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, method='GET', allow_n_plus_one=False):
+        """``budget`` is an int or a view class declaring ``query_budget``."""
+        if not isinstance(budget, int):
+            view = budget
+            budget = view_query_budget(view, method)
+            if budget is None:
+                self.fail(f'{view.__name__} declares no query budget for {method}')
+        with QueryRecorder() as recorder:
+            yield recorder
+        listing = '\n'.join(f'  {shape}' for shape, _ in recorder.queries)
+        self.assertLessEqual(
+            recorder.count, budget,
+            f'{recorder.count} queries executed, budget is {budget}:\n{listing}',
+        )
+        if not allow_n_plus_one:
+            repeated = recorder.repeated_shapes()
+            self.assertFalse(
+                repeated,
+                'N+1 query pattern detected:\n'
+                + '\n'.join(f'  x{count}: {shape}' for shape, count in repeated.items()),
+            )
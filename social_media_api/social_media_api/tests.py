@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.views import ProfileView
+from posts.feed import Feed
+from posts.models import Post, TimelineEntry
+from posts.serializers import PostSerializer
+
+from .queries import QueryRecorder, query_shape
+from .renderers import ORJSONParser, ORJSONRenderer, dumps
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryBudgetMiddlewareTestCase(TestCase):
+    """
+    Tests for per-request query recording and N+1 detection.
+    """
+    def test_shape_ignores_parameters_and_in_list_length(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s) AND n = 3'),
+            query_shape('SELECT * FROM t WHERE id IN (%s) AND n = 4'),
+        )
+
+    def test_repeated_queries_are_flagged(self):
+        author = User.objects.create_user(username='author', password='pass12345')
+        posts = [Post.objects.create(author=author, title=str(i), content='...') for i in range(6)]
+        with QueryRecorder() as recorder:
+            for post in Post.objects.filter(pk__in=[post.pk for post in posts]):
+                post.author.username
+        self.assertEqual(recorder.count, 7)
+        self.assertEqual(list(recorder.repeated_shapes().values()), [6])
+
+    @override_settings(DEBUG=True)
+    def test_debug_responses_carry_query_headers(self):
+        response = self.client.get(reverse('post-list'))
+        self.assertIn('X-Query-Count', response)
+        self.assertEqual(response['X-Query-Budget'], '3')
+        self.assertNotIn('X-Query-N-Plus-One', response)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AsyncAPIViewTestCase(TestCase):
+    """
+    Tests for the async-native read endpoints.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+        author = User.objects.create_user(username='author', password='pass12345')
+        for i in range(3):
+            post = Post.objects.create(author=author, title=str(i), content='...')
+            TimelineEntry.objects.create(user=self.user, post=post, author=author, created_at=post.created_at)
+
+    async def test_token_authenticated_feed_over_asgi(self):
+        response = await self.async_client.get(
+            reverse('feed'), {'page_size': 2}, headers={'Authorization': f'Token {self.token.key}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([post['title'] for post in body['results']], ['2', '1'])
+        self.assertIsNotNone(body['next'])
+
+    async def test_missing_or_invalid_credentials(self):
+        response = await self.async_client.get(reverse('notifications'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('profile'), headers={'Authorization': 'Token nope'})
+        self.assertEqual((response.status_code, response.json()), (401, {'detail': 'Invalid token.'}))
+
+    async def test_errors_go_through_the_exception_handler(self):
+        response = await self.async_client.get(reverse('feed'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        headers = {'Authorization': f'Token {self.token.key}'}
+        response = await self.async_client.delete(reverse('feed'), headers=headers)
+        self.assertEqual((response.status_code, response['Allow']), (405, 'GET, HEAD, OPTIONS'))
+        self.assertEqual(response.json(), {'detail': 'Method "DELETE" not allowed.'})
+        with patch.object(ProfileView, 'get', side_effect=Http404):
+            response = await self.async_client.get(reverse('profile'), headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_missing_row_is_not_found(self):
+        async def get(view, request):
+            return Response(await Post.objects.aget(pk=0))
+
+        with patch.object(Feed, 'get', get):
+            response = await self.async_client.get(reverse('feed'), headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_content_negotiation(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        response = await self.async_client.get(reverse('feed'), headers={**headers, 'Accept': 'text/html'})
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'text/html; charset=utf-8'))
+        self.assertIn(b'Feed', response.content)
+        response = await self.async_client.get(reverse('profile'), headers={**headers, 'Accept': 'text/html'})
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('feed'), headers={**headers, 'Accept': 'application/xml'})
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response['Vary'], 'Accept')
+
+    @override_settings(DEBUG=True)
+    async def test_async_requests_are_query_counted(self):
+        response = await self.async_client.get(reverse('feed'), headers={'Authorization': f'Token {self.token.key}'})
+        # Token lookup, the validator ids, the timeline page and the page's likes.
+        self.assertEqual((response['X-Query-Count'], response['X-Query-Budget']), ('4', '5'))
+
+    @override_settings(DEBUG=True)
+    async def test_jwt_authentication_needs_no_query(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        response = await self.async_client.get(reverse('feed'), headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual((response.status_code, response['X-Query-Count']), (200, '3'))
+
+
+class ORJSONRendererTestCase(TestCase):
+    """
+    Tests for the orjson renderer and parser.
+    """
+    def test_matches_drf_json_renderer(self):
+        author = User.objects.create_user(username='author', password='pass12345')
+        post = Post.objects.create(author=author, title='Héllo', content='...')
+        data = {
+            'post': PostSerializer(post).data,
+            'price': Decimal('9.99'),
+            'when': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            'liked_by_me': {post.pk: True},
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_escapes_line_separators(self):
+        data = {'content': 'one\u2028two\u2029three'}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(dumps(data), JSONRenderer().render(data))
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO('{"a": [1, "é"]}'.encode())), {'a': [1, 'é']})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{nope'))